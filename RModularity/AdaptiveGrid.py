@@ -0,0 +1,25 @@
+
+
+import numpy as np
+
+
+def refineProbabilities(probabilities, TPRValues, tolerance, maxNewPoints):
+    # New rewire probabilities for the adaptive grid of RModularity.
+    # Returns an empty list (stopping the refinement) if the estimated
+    # integration error is within the tolerance or no more points can
+    # be added.
+    # Error bound of the trapezoidal rule in each interval,
+    # (assuming TPR is monotonic inside the interval)
+    intervalErrors = [
+        0.5*(probabilities[index+1]-probabilities[index]) *
+        abs(TPRValues[index+1]-TPRValues[index])
+        for index in range(len(probabilities)-1)]
+    if(maxNewPoints <= 0 or sum(intervalErrors) <= tolerance):
+        return []
+    # Bisecting the intervals above their share of the tolerance,
+    # starting from the largest errors.
+    refineIndices = [index for index in np.argsort(intervalErrors)[::-1]
+                     if intervalErrors[index] > tolerance/len(intervalErrors)]
+    refineIndices = refineIndices[:maxNewPoints]
+    return [0.5*(probabilities[index]+probabilities[index+1])
+            for index in refineIndices]
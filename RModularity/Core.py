@@ -4,51 +4,133 @@ import louvain
 import igraph as ig
 from graph_tool import openmp_set_num_threads as gtOpenmp_set_num_threads
 from graph_tool import Graph as gtGraph
+from graph_tool import seed_rng as gtSeed_rng
 import graph_tool.inference as gtInference
 import numpy as np
 from tqdm.auto import tqdm, trange
-from collections import Counter
+from collections import Counter, deque
+import itertools
 import multiprocessing as mp
 import louvain
 import os
 import random
+import time
+from .TPRTable import loadTPRTable, isSaturatedProbability
+from .Result import RModularityResult
+from .Threads import restoresGraphToolThreads
+from .AdaptiveGrid import refineProbabilities
 
+# np.trapz was renamed to np.trapezoid (and removed in NumPy 2.4)
+trapezoid = getattr(np, "trapezoid", None) or np.trapz
 
-def LouvainModularity(aNetwork):
+# Unique keys of the attempts submitted by runPoolTasks
+attemptKeys = itertools.count()
+
+
+def seedFromSequence(seedSequence):
+    # Non-negative 31 bits integer accepted by graph-tool, louvain and numpy
+    return int(seedSequence.generate_state(1)[0] >> 1)
+
+
+def spawnSeedSequences(seedSequence, count):
+    # Same as seedSequence.spawn(count), but it does not depend on
+    # previous calls, so a task always gets the same streams.
+    return [np.random.SeedSequence(
+        seedSequence.entropy, spawn_key=seedSequence.spawn_key+(0, childIndex))
+        for childIndex in range(count)]
+
+
+def perturbationSeedSequence(rootEntropy, probability, perturbationIndex):
+    # Depends only on the probability and the perturbation index, so that
+    # the same perturbation is obtained regardless of the grid or backend.
+    return np.random.SeedSequence(
+        rootEntropy,
+        spawn_key=(0, int(round(probability*1e9)), perturbationIndex))
+
+
+def modularitySeedSequence(rootEntropy, nullmodelIndex=None):
+    # Louvain detections for the network or for a nullmodel realization
+    if(nullmodelIndex is None):
+        return np.random.SeedSequence(rootEntropy, spawn_key=(1,))
+    return np.random.SeedSequence(rootEntropy, spawn_key=(2, nullmodelIndex))
+
+
+def reseedTaskArgs(args, attempt):
+    # Extra attempt (e.g. speculative copy) of a task, the task seed
+    # becomes (seedSequence, attempt) so that the attempt samples the
+    # same network and only its detections are seeded differently.
+    *otherArgs, taskSeed = args
+    seedSequence, _ = splitTaskSeed(taskSeed)
+    return (*otherArgs, (seedSequence, attempt))
+
+
+def splitTaskSeed(taskSeed):
+    # Returns the seed sequence of a task and the attempt number
+    if(isinstance(taskSeed, tuple)):
+        return taskSeed
+    return taskSeed, 0
+
+
+def attemptSeedSequence(seedSequence, attempt):
+    # Seed sequence for the streams that are re-drawn on each attempt
+    if(attempt == 0):
+        return seedSequence
+    return np.random.SeedSequence(
+        seedSequence.entropy, spawn_key=seedSequence.spawn_key+(1, attempt))
+
+
+def LouvainModularity(aNetwork, seed=None):
     partition = louvain.find_partition(
-        aNetwork, louvain.ModularityVertexPartition)
+        aNetwork, louvain.ModularityVertexPartition, seed=seed)
     return partition.quality()
 
 
-def SBMMinimizeMembership(vertexCount, edges, directed=False, degreeCorrected=True):
-    g = gtGraph(directed=directed)
-    for _ in range(0, vertexCount):
-        g.add_vertex()
-    for edge in edges:
-        g.add_edge(edge[0], edge[1])
-    state = gtInference.minimize.minimize_blockmodel_dl(
-        g, state_args={"deg_corr": degreeCorrected})
-    DLDetected = state.entropy()
-    DLTrivial = gtInference.blockmodel.BlockState(
-        g, B=1, deg_corr=degreeCorrected).entropy()
+def SBMMinimizeMembership(vertexCount, edges, directed=False, degreeCorrected=True, seed=None):
+    if(seed is not None):
+        gtSeed_rng(seed)
+        # graph-tool also draws from the global numpy generator,
+        # which is restored afterwards for the caller.
+        numpyState = np.random.get_state()
+        np.random.seed(seed)
+    try:
+        g = gtGraph(directed=directed)
+        for _ in range(0, vertexCount):
+            g.add_vertex()
+        for edge in edges:
+            g.add_edge(edge[0], edge[1])
+        state = gtInference.minimize.minimize_blockmodel_dl(
+            g, state_args={"deg_corr": degreeCorrected})
+        DLDetected = state.entropy()
+        DLTrivial = gtInference.blockmodel.BlockState(
+            g, B=1, deg_corr=degreeCorrected).entropy()
+    finally:
+        if(seed is not None):
+            np.random.set_state(numpyState)
     return (list(state.get_blocks()), DLDetected, DLTrivial)
 
 
-def calculateMaxModularity(g, trials=100):
+def calculateMaxModularity(g, trials=100, seedSequence=None):
+    if(seedSequence is None):
+        trialSeeds = [None]*trials
+    else:
+        trialSeeds = [seedFromSequence(trialSeedSequence)
+                      for trialSeedSequence in spawnSeedSequences(seedSequence, trials)]
     maxModularity = -1
-    for _ in range(trials):
-        modularity = LouvainModularity(g)
+    for trialSeed in trialSeeds:
+        modularity = LouvainModularity(g, seed=trialSeed)
         if(modularity > maxModularity):
             maxModularity = modularity
     return maxModularity
 
 
-def rewireNetwork(nodeCount, edges, probability):
+def rewireNetwork(nodeCount, edges, probability, rng=None):
+    if(rng is None):
+        rng = np.random.default_rng()
     edgesCount = len(edges)
     newEdges = np.array(edges)
-    mask = np.random.random(edgesCount) < probability
+    mask = rng.random(edgesCount) < probability
     selectedEdgesIndices = np.where(mask)[0]
-    generatedSelectedEdges = np.array(np.random.randint(
+    generatedSelectedEdges = np.array(rng.integers(
         0, nodeCount, (len(selectedEdgesIndices), 2)))
     newEdges[selectedEdgesIndices] = generatedSelectedEdges
     newEdges = [(fromIndex, toIndex) for fromIndex, toIndex in newEdges]
@@ -61,28 +143,349 @@ def getMajorConnectedComponent(nodeCount, edges, directed=False):
     return (giant.vcount(), giant.get_edgelist())
 
 
+def screenPerturbedNetwork(nodeCount, edges, screeningArgs, seedSequence):
+    # Cheap screen based on the z-score of the maximum Louvain modularity
+    # against configuration model realizations of the same network
+    # (undirected networks only).
+    randomZScore, structuredZScore, nullmodelCount, louvainTrials, _ = screeningArgs
+    networkSeedSequence, *nullmodelSeedSequences = spawnSeedSequences(
+        seedSequence, nullmodelCount+1)
+    g = ig.Graph(nodeCount, edges, directed=False).simplify()
+    modularity = calculateMaxModularity(
+        g, trials=louvainTrials, seedSequence=networkSeedSequence)
+    nullmodelModularities = [modularityNullmodel((g, louvainTrials, nullmodelSeedSequence))
+                             for nullmodelSeedSequence in nullmodelSeedSequences]
+    nullmodelStd = np.std(nullmodelModularities)
+    if(nullmodelStd == 0):
+        return (None, np.nan)
+    zScore = (modularity-np.mean(nullmodelModularities))/nullmodelStd
+    if(zScore >= structuredZScore):
+        return ("structured", zScore)
+    if(zScore <= randomZScore):
+        return ("random", zScore)
+    return (None, zScore)
+
+
 def calculatePerturbedTrivialCount(args):
-    # Reseeding
-    np.random.seed(int.from_bytes(os.urandom(4), byteorder='little'))
     trivialCount = 0
     nodeCount, edges, directed, probability, \
-        detectionTrials = args
-    newEdges = rewireNetwork(nodeCount, edges, probability)
+        detectionTrials, screeningArgs, taskSeed = args
+    seedSequence, attempt = splitTaskSeed(taskSeed)
+    # Independent streams for rewiring, for each detection and for screening.
+    # Extra attempts keep the perturbed network (and calibration choice).
+    rewireSeedSequence, *_, calibrationSeedSequence = spawnSeedSequences(
+        seedSequence, detectionTrials+3)
+    _, *detectionSeedSequences, screeningSeedSequence, _ = spawnSeedSequences(
+        attemptSeedSequence(seedSequence, attempt), detectionTrials+3)
+    newEdges = rewireNetwork(nodeCount, edges, probability,
+                             rng=np.random.default_rng(rewireSeedSequence))
     newNodeCount = nodeCount
     allDLDetected = []
     allDLTrivial = []
     (newNodeCount, newEdges) = getMajorConnectedComponent(
         nodeCount, newEdges, directed)
+    screeningResult = None
+    if(screeningArgs is not None):
+        decision, zScore = screenPerturbedNetwork(
+            newNodeCount, newEdges, screeningArgs, screeningSeedSequence)
+        calibrationRate = screeningArgs[4]
+        calibrated = decision is not None and \
+            np.random.default_rng(calibrationSeedSequence).random() < calibrationRate
+        screeningResult = {"decision": decision,
+                           "zScore": zScore, "calibrated": calibrated}
+        if(decision is not None and not calibrated):
+            # Full SBM fit skipped, no description lengths available
+            if(decision == "random"):
+                trivialCount = detectionTrials
+            return trivialCount, [np.nan]*detectionTrials, [np.nan]*detectionTrials, screeningResult
     for detectionIndex in range(0, detectionTrials):
         communities, DLDetected, DLTrivial = SBMMinimizeMembership(
-            newNodeCount, newEdges, directed=directed)
+            newNodeCount, newEdges, directed=directed,
+            seed=seedFromSequence(detectionSeedSequences[detectionIndex]))
         if(len(set(communities)) == 1):
             trivialCount += 1
         allDLDetected.append(DLDetected)
         allDLTrivial.append(DLTrivial)
-    return trivialCount, allDLDetected, allDLTrivial
+    return trivialCount, allDLDetected, allDLTrivial, screeningResult
+
+
+def updateScreeningReport(screeningReport, screeningResult, trivialCount, detectionTrials):
+    # Counts the screening decisions and, for the calibrated perturbations,
+    # the detections in which the full SBM fit disagrees with the screen.
+    if(screeningReport is None or screeningResult is None):
+        return
+    for key in ("screened", "structured", "random", "ambiguous", "calibrated",
+                "calibrationDetections", "disagreements",
+                "structuredDisagreements", "randomDisagreements"):
+        screeningReport.setdefault(key, 0)
+    decision = screeningResult["decision"]
+    screeningReport["screened"] += 1
+    screeningReport[decision if decision is not None else "ambiguous"] += 1
+    if(screeningResult["calibrated"]):
+        if(decision == "random"):
+            disagreements = detectionTrials-trivialCount
+        else:
+            disagreements = trivialCount
+        screeningReport["calibrated"] += 1
+        screeningReport["calibrationDetections"] += detectionTrials
+        screeningReport["disagreements"] += disagreements
+        screeningReport["%sDisagreements" % decision] += disagreements
+    if(screeningReport["calibrationDetections"] > 0):
+        screeningReport["disagreementRate"] = screeningReport["disagreements"] / \
+            screeningReport["calibrationDetections"]
+    else:
+        screeningReport["disagreementRate"] = np.nan
+
+
+def timedTask(args):
+    func, taskIndex, funcArgs, taskStartTimes, attemptKey = args
+    # Wall clock start, shared with the main process
+    if(taskStartTimes is not None):
+        taskStartTimes[attemptKey] = time.time()
+    startTime = time.perf_counter()
+    try:
+        result = func(funcArgs)
+    finally:
+        if(taskStartTimes is not None):
+            taskStartTimes.pop(attemptKey, None)
+    return taskIndex, time.perf_counter()-startTime, result
+
+
+def startTaskTracking(taskTimeout=None, speculativeFactor=None):
+    # Manager dict in which the workers record the start of each attempt,
+    # shared by all the batches run in the same pool.
+    if(taskTimeout is None and speculativeFactor is None):
+        return None, None
+    manager = mp.Manager()
+    return manager, manager.dict()
+
+
+def runPoolTasks(
+    pool,
+    func,
+    allArgs,
+    processCount,
+    taskTimeout=None,
+    speculativeFactor=None,
+    maxSpeculativeCopies=1,
+    reseedArgs=None,
+    stragglerStats=None,
+    taskStartTimes=None,
+    durationKey=None,
+    pollInterval=0.05
+):
+    """
+    Runs func for each of the arguments in allArgs using the
+    pool and yields (taskIndex, result) as soon as each task
+    finishes. Optionally handles stragglers by launching
+    speculative copies of slow tasks, the first copy to finish
+    wins and the others are abandoned (they keep their worker
+    busy until they finish or the pool is terminated).
+
+    Parameters
+    ----------
+    pool : multiprocessing.Pool
+        The pool used to run the tasks.
+    func : function
+        The function to be called for each argument.
+    allArgs : list
+        The arguments of each task.
+    processCount : int
+        The number of processes in the pool.
+    taskTimeout : float, optional
+        Time budget in seconds for each task. A copy of a task
+        is launched when it runs for longer than this budget.
+        (defaults to None, no timeout)
+    speculativeFactor : float, optional
+        When the rest of the batch is done, tasks running for
+        more than speculativeFactor times the median duration
+        of the finished tasks are executed again.
+        (defaults to None, no speculative execution)
+    maxSpeculativeCopies : int, optional
+        The maximum number of extra copies of each task.
+        (defaults to 1)
+    reseedArgs : function, optional
+        Function called as reseedArgs(args, attempt) returning
+        the arguments (with fresh seeds) of an extra copy.
+        (defaults to None, copies use the same arguments)
+    stragglerStats : dict, optional
+        Dictionary updated with the counts of "tasks",
+        "timeouts", "speculative" (copies launched) and
+        "speculativeWins" (tasks won by a copy).
+        (defaults to None)
+    taskStartTimes : dict, optional
+        Manager dict (see startTaskTracking) in which the workers
+        record the start time of each attempt. Pass the same dict
+        to all the batches run in a pool, so that the attempts
+        abandoned by previous batches are known to keep their
+        workers busy.
+        (defaults to None, a new dict is used for this batch)
+    durationKey : function, optional
+        Function called as durationKey(args) returning the kind
+        of a task. Speculative execution compares each task only
+        against the median duration of the finished tasks of the
+        same kind.
+        (defaults to None, all the tasks are of the same kind)
+    pollInterval : float, optional
+        Interval in seconds between checks of the tasks.
+        (defaults to 0.05)
+    Yields
+    -------
+    (int, object)
+        The index of the task and its result.
+    """
+    if(stragglerStats is None):
+        stragglerStats = {}
+    for statName in ("tasks", "timeouts", "speculative", "speculativeWins"):
+        stragglerStats.setdefault(statName, 0)
+    stragglerStats["tasks"] += len(allArgs)
+
+    if(taskTimeout is None and speculativeFactor is None):
+        allTimedArgs = [(func, taskIndex, args, None, None)
+                        for taskIndex, args in enumerate(allArgs)]
+        for taskIndex, _, result in pool.imap_unordered(func=timedTask, iterable=allTimedArgs):
+            yield taskIndex, result
+        return
+
+    manager = None
+    if(taskStartTimes is None):
+        manager, taskStartTimes = startTaskTracking(
+            taskTimeout, speculativeFactor)
+    try:
+        yield from scheduleAttempts(
+            pool, func, allArgs, processCount, taskTimeout, speculativeFactor,
+            maxSpeculativeCopies, reseedArgs, stragglerStats, taskStartTimes,
+            durationKey, pollInterval)
+    finally:
+        if(manager is not None):
+            manager.shutdown()
+
+
+def scheduleAttempts(
+    pool,
+    func,
+    allArgs,
+    processCount,
+    taskTimeout,
+    speculativeFactor,
+    maxSpeculativeCopies,
+    reseedArgs,
+    stragglerStats,
+    taskStartTimes,
+    durationKey,
+    pollInterval
+):
+    # Attempts are only submitted to the pool when a worker is free,
+    # thus copies of stragglers (queued first) start right away and
+    # the start times recorded by the workers are the actual ones.
+    pendingTasks = deque(range(len(allArgs)))
+    queuedCopies = set()
+    taskAttempts = {}
+    activeAttempts = []
+    # Durations of the finished tasks for each kind of task
+    durations = {}
+    if(durationKey is None):
+        taskKinds = [None]*len(allArgs)
+    else:
+        taskKinds = [durationKey(args) for args in allArgs]
+
+    def submitAttempt(taskIndex):
+        args = allArgs[taskIndex]
+        attemptIndex = len(taskAttempts.get(taskIndex, []))
+        if(attemptIndex > 0):
+            stragglerStats["speculative"] += 1
+            if(reseedArgs is not None):
+                args = reseedArgs(args, attemptIndex)
+        attemptKey = next(attemptKeys)
+        attempt = {
+            "taskIndex": taskIndex,
+            "key": attemptKey,
+            "result": pool.apply_async(
+                timedTask, ((func, taskIndex, args, taskStartTimes, attemptKey),)),
+            "startTime": None,
+        }
+        activeAttempts.append(attempt)
+        taskAttempts.setdefault(taskIndex, []).append(attempt)
+
+    finishedCount = 0
+    while(finishedCount < len(allArgs)):
+        # Atomic snapshot (workers add and remove entries concurrently)
+        startTimes = taskStartTimes.copy()
+        now = time.time()
+        finishedResults = []
+        unstartedCount = 0
+        for attempt in list(activeAttempts):
+            if(attempt["result"].ready()):
+                activeAttempts.remove(attempt)
+                taskIndex = attempt["taskIndex"]
+                if(taskIndex in taskAttempts):
+                    taskIndex, duration, result = attempt["result"].get()
+                    durations.setdefault(taskKinds[taskIndex], []).append(duration)
+                    if(attempt is not taskAttempts[taskIndex][0]):
+                        stragglerStats["speculativeWins"] += 1
+                    del taskAttempts[taskIndex]
+                    finishedResults.append((taskIndex, result))
+            elif(attempt["startTime"] is None):
+                if(attempt["key"] in startTimes):
+                    attempt["startTime"] = startTimes[attempt["key"]]
+                else:
+                    unstartedCount += 1
+        finishedCount += len(finishedResults)
+        for finishedResult in finishedResults:
+            yield finishedResult
+
+        # Workers running any attempt of this pool, including the ones
+        # abandoned by previous batches, or about to start one.
+        busyCount = len(startTimes)+unstartedCount
+        stragglerTimes = {}
+        if(speculativeFactor is not None):
+            stragglerTimes = {taskKind: speculativeFactor*np.median(kindDurations)
+                              for taskKind, kindDurations in durations.items()}
+        for taskIndex, currentAttempts in taskAttempts.items():
+            lastAttempt = currentAttempts[-1]
+            if(lastAttempt["startTime"] is None or taskIndex in queuedCopies
+               or len(currentAttempts) > maxSpeculativeCopies):
+                continue
+            runningTime = now-lastAttempt["startTime"]
+            stragglerTime = stragglerTimes.get(taskKinds[taskIndex])
+            if(taskTimeout is not None and runningTime > taskTimeout):
+                stragglerStats["timeouts"] += 1
+                pendingTasks.appendleft(taskIndex)
+                queuedCopies.add(taskIndex)
+            elif(stragglerTime is not None and not pendingTasks
+                 and busyCount < processCount
+                 and runningTime > stragglerTime):
+                pendingTasks.appendleft(taskIndex)
+                queuedCopies.add(taskIndex)
+                busyCount += 1
+
+        busyCount = len(startTimes)+unstartedCount
+        while(pendingTasks and busyCount < processCount):
+            taskIndex = pendingTasks.popleft()
+            if(taskIndex in queuedCopies):
+                queuedCopies.remove(taskIndex)
+                if(taskIndex not in taskAttempts):
+                    # Finished before its copy was submitted
+                    continue
+            submitAttempt(taskIndex)
+            busyCount += 1
 
+        if(finishedCount < len(allArgs) and not finishedResults):
+            time.sleep(pollInterval)
 
+
+def closePool(pool, abandonTasks=False, manager=None):
+    # Abandoned speculative copies may still be running
+    if(abandonTasks):
+        pool.terminate()
+    else:
+        pool.close()
+    pool.join()
+    if(manager is not None):
+        manager.shutdown()
+
+
+@restoresGraphToolThreads
 def RModularity(
     nodeCount,
     edges,
@@ -92,7 +495,23 @@ def RModularity(
     rewireResolution=51,
     outputCurves=False,
     showProgress=True,
-    useMultiprocessing=True
+    useMultiprocessing=True,
+    taskTimeout=None,
+    speculativeFactor=None,
+    stragglerStats=None,
+    TPRLookupTable=None,
+    TPRLookupCheckCount=0,
+    seed=None,
+    adaptiveGrid=False,
+    adaptiveInitialResolution=9,
+    adaptiveTolerance=0.01,
+    screening=False,
+    screeningZScores=(1.0, 10.0),
+    screeningNullmodelCount=10,
+    screeningDetectionTrials=3,
+    screeningCalibrationRate=0.05,
+    screeningReport=None,
+    curvesDType=None
 ):
     """
     Computes the Robustness Modularity of a network.
@@ -128,83 +547,256 @@ def RModularity(
         Uses parallel processing to calculate
         Rmodularity.
         (defaults to True)
+    taskTimeout : float, optional
+        Time budget in seconds for each perturbation task. Tasks
+        exceeding it are executed again and the first result
+        to finish is used (only with multiprocessing).
+        (defaults to None, no timeout)
+    speculativeFactor : float, optional
+        Once the rest of a batch is done, tasks running for more
+        than speculativeFactor times the median task duration are
+        executed again and the first result to finish is used
+        (only with multiprocessing).
+        (defaults to None, no speculative execution)
+    stragglerStats : dict, optional
+        If provided, it is updated with the counts of "tasks",
+        "timeouts", "speculative" (extra copies launched) and
+        "speculativeWins" (tasks won by an extra copy).
+        (defaults to None)
+    TPRLookupTable : str, path-like or dict, optional
+        Path to a TPR lookup table file or a table loaded by
+        loadTPRTable. Probabilities that are saturated (TPR=1)
+        for random networks of similar size are not calculated
+        and their DL curves are set to NaN.
+        (defaults to None)
+    TPRLookupCheckCount : int, optional
+        Number of perturbations still calculated at saturated
+        probabilities to check the lookup table. If any of them
+        is not trivial, all the perturbations are calculated.
+        (defaults to 0)
+    seed : int, optional
+        Seed used to derive independent random streams for
+        each perturbation (rewiring and community detection),
+        so that a given probability and perturbation index
+        always produce the same result. When a seed is given,
+        graph-tool runs single-threaded (as when using
+        multiprocessing). Reproducibility requires no timeouts
+        or speculative copies.
+        (defaults to None, random seed)
+    adaptiveGrid : bool, optional
+        Instead of a uniform grid of rewireResolution points,
+        starts with a coarse grid and bisects the intervals in
+        which the estimated integration error is larger, i.e.,
+        where TPR changes. In this case rewireResolution is the
+        maximum number of points and the returned probabilities
+        are not evenly spaced.
+        (defaults to False)
+    adaptiveInitialResolution : int, optional
+        The number of evenly spaced points of the initial grid
+        for the adaptive grid.
+        (defaults to 9)
+    adaptiveTolerance : float, optional
+        Target for the estimated integration error of the
+        Robustness Modularity for the adaptive grid.
+        (defaults to 0.01)
+    screening : bool, optional
+        Screens each perturbed network using the z-score of its
+        maximum Louvain modularity against configuration model
+        realizations. Networks with z-score above the structured
+        threshold are counted as non-trivial, networks below the
+        random threshold are counted as trivial and the full
+        SBM fit is only performed for the remaining networks.
+        Screening is disabled for directed networks. The DL
+        curves are NaN for the screened networks.
+        (defaults to False)
+    screeningZScores : (float, float), optional
+        The (random, structured) z-score thresholds used for
+        screening.
+        (defaults to (1.0, 10.0))
+    screeningNullmodelCount : int, optional
+        The number of configuration model realizations used to
+        calculate the z-score of each perturbed network.
+        (defaults to 10)
+    screeningDetectionTrials : int, optional
+        The number of Louvain detections used to find the maximum
+        modularity of each network (and null model realization).
+        (defaults to 3)
+    screeningCalibrationRate : float, optional
+        Fraction of the screened (decided) networks for which the
+        full SBM fit is still performed and used, in order to
+        check the screen.
+        (defaults to 0.05)
+    screeningReport : dict, optional
+        If provided, it is updated with the counts of "screened",
+        "structured", "random" and "ambiguous" networks, of
+        "calibrated" networks and their "calibrationDetections",
+        and of the "disagreements" (also "structuredDisagreements"
+        and "randomDisagreements") between the screen and the full
+        SBM fit, as well as the "disagreementRate".
+        (defaults to None)
+    curvesDType : numpy dtype, optional
+        The dtype used to store the DL curves, e.g., np.float32
+        to halve their memory.
+        (defaults to None, np.float64)
     Returns
     -------
     float 
         The RModularity of the network.
-    (float, np.array dim=1, np.array dim=1, np.array dim=2, np.array dim=2) if outputCurves is True
-        The tuple (RModularity, probabilities, TPR curves, DL Detected, DL Trivial) containing
-        the Robustness Modularity, the rewire probabilities, the TPR curves, the Description
-        lenghts for the detected and trivial partitions.
+    RModularityResult if outputCurves is True
+        The Robustness Modularity, the rewire probabilities, the TPR curves and the
+        Description lenghts for the trivial and detected partitions. It can be unpacked
+        as the tuple (RModularity, probabilities, TPRCurve, DLCurvesTrivial,
+        DLCurvesDetected), saved to ".npz" or memory-mapped files and provides
+        summary statistics of the DL curves.
     """
-    TPRCurve = np.zeros(rewireResolution)
-    DLCurvesDetected = np.zeros(
-        (rewireResolution, detectionTrials*perturbationCount))
-    DLCurvesTrivial = np.zeros(
-        (rewireResolution, detectionTrials*perturbationCount))
-    probabilities = np.linspace(0, 1, rewireResolution)
+    if(isinstance(TPRLookupTable, (str, os.PathLike))):
+        TPRLookupTable = loadTPRTable(TPRLookupTable)
+    rootEntropy = np.random.SeedSequence(seed).entropy
+    screeningArgs = None
+    # The screen (undirected modularity and nullmodel) does not
+    # apply to directed networks
+    if(screening and not directed):
+        screeningArgs = (*screeningZScores, screeningNullmodelCount,
+                         screeningDetectionTrials, screeningCalibrationRate)
 
     (nodeCount, edges) = getMajorConnectedComponent(
         nodeCount, edges, directed)
-    if(showProgress):
-        probabilitiesIterator = tqdm(probabilities, desc="Current p")
-    else:
-        probabilitiesIterator = probabilities
-    if(useMultiprocessing):
-        num_processors = mp.cpu_count()
+    if(useMultiprocessing or seed is not None):
         # Disabling internal multithreading of graph_tool
+        # (also required for reproducible fits)
         gtOpenmp_set_num_threads(1)
+    if(useMultiprocessing):
+        num_processors = mp.cpu_count()
 
     if(useMultiprocessing):
         pool = mp.Pool(processes=num_processors)
-    for probabilityIndex, probability in enumerate(probabilitiesIterator):
+        manager, taskStartTimes = startTaskTracking(
+            taskTimeout, speculativeFactor)
+
+    def calculatePerturbations(probability, perturbationIndices, DLCurveTrivial, DLCurveDetected):
         trivialCount = 0
+        allArgs = [(nodeCount, edges, directed, probability, detectionTrials, screeningArgs,
+                    perturbationSeedSequence(rootEntropy, probability, perturbationIndex))
+                   for perturbationIndex in perturbationIndices]
         if(useMultiprocessing):
-            allArgs = [(nodeCount, edges, directed, probability,
-                        detectionTrials)]*perturbationCount
-            perturbationIndex = 0
+            poolIterator = runPoolTasks(
+                pool, calculatePerturbedTrivialCount, allArgs, num_processors,
+                taskTimeout=taskTimeout, speculativeFactor=speculativeFactor,
+                reseedArgs=reseedTaskArgs, stragglerStats=stragglerStats,
+                taskStartTimes=taskStartTimes)
+        else:
+            poolIterator = enumerate(map(calculatePerturbedTrivialCount, allArgs))
 
-            for newTrivialCount, allDLDetected, allDLTrivial in tqdm(pool.imap_unordered(func=calculatePerturbedTrivialCount, iterable=allArgs), total=len(allArgs), desc="Perturbation", leave=False):
-                trivialCount += newTrivialCount
-                DLCurvesTrivial[probabilityIndex, perturbationIndex *
-                                detectionTrials:(perturbationIndex+1)*detectionTrials] = allDLTrivial
-                DLCurvesDetected[probabilityIndex, perturbationIndex *
-                                 detectionTrials:(perturbationIndex+1)*detectionTrials] = allDLDetected
-                perturbationIndex += 1
+        for taskIndex, (newTrivialCount, allDLDetected, allDLTrivial, screeningResult) in tqdm(poolIterator, total=len(perturbationIndices), desc="Perturbation", leave=False):
+            perturbationIndex = perturbationIndices[taskIndex]
+            trivialCount += newTrivialCount
+            updateScreeningReport(screeningReport, screeningResult,
+                                  newTrivialCount, detectionTrials)
+            DLCurveTrivial[perturbationIndex *
+                           detectionTrials:(perturbationIndex+1)*detectionTrials] = allDLTrivial
+            DLCurveDetected[perturbationIndex *
+                            detectionTrials:(perturbationIndex+1)*detectionTrials] = allDLDetected
+        return trivialCount
+
+    def calculateCurvePoint(probability):
+        DLCurveTrivial = np.zeros(
+            detectionTrials*perturbationCount, dtype=curvesDType)
+        DLCurveDetected = np.zeros(
+            detectionTrials*perturbationCount, dtype=curvesDType)
+        trivialCount = 0
+        perturbationIndices = range(perturbationCount)
+        if(isSaturatedProbability(TPRLookupTable, nodeCount, len(edges), directed, probability)):
+            # Only a few perturbations (if any) are calculated
+            # to check the TPR from the lookup table.
+            DLCurveTrivial[:] = np.nan
+            DLCurveDetected[:] = np.nan
+            checkIndices = range(min(TPRLookupCheckCount, perturbationCount))
+            trivialCount = calculatePerturbations(
+                probability, checkIndices, DLCurveTrivial, DLCurveDetected)
+            if(trivialCount == len(checkIndices)*detectionTrials):
+                return 1.0, DLCurveTrivial, DLCurveDetected
+            perturbationIndices = range(len(checkIndices), perturbationCount)
+        trivialCount += calculatePerturbations(
+            probability, perturbationIndices, DLCurveTrivial, DLCurveDetected)
+        TPRValue = trivialCount / \
+            (perturbationCount*detectionTrials)
+        return TPRValue, DLCurveTrivial, DLCurveDetected
 
-            TPRCurve[probabilityIndex] = trivialCount / \
-                (perturbationCount*detectionTrials)
+    if(adaptiveGrid):
+        curvePoints = {}
+        newProbabilities = list(np.linspace(
+            0, 1, min(adaptiveInitialResolution, rewireResolution)))
+        if(showProgress):
+            pbar = tqdm(total=rewireResolution, desc="Current p")
+        while(newProbabilities):
+            for probability in newProbabilities:
+                curvePoints[probability] = calculateCurvePoint(probability)
+                if(showProgress):
+                    pbar.update(1)
+            probabilities = sorted(curvePoints)
+            TPRValues = [curvePoints[probability][0]
+                         for probability in probabilities]
+            newProbabilities = refineProbabilities(
+                probabilities, TPRValues, adaptiveTolerance,
+                rewireResolution-len(curvePoints))
+        if(showProgress):
+            pbar.close()
+        probabilities = np.array(probabilities)
+        TPRCurve = np.array([curvePoints[probability][0]
+                             for probability in probabilities])
+        DLCurvesTrivial = np.array([curvePoints[probability][1]
+                                    for probability in probabilities], dtype=curvesDType)
+        DLCurvesDetected = np.array([curvePoints[probability][2]
+                                     for probability in probabilities], dtype=curvesDType)
+    else:
+        TPRCurve = np.zeros(rewireResolution)
+        DLCurvesDetected = np.zeros(
+            (rewireResolution, detectionTrials*perturbationCount), dtype=curvesDType)
+        DLCurvesTrivial = np.zeros(
+            (rewireResolution, detectionTrials*perturbationCount), dtype=curvesDType)
+        probabilities = np.linspace(0, 1, rewireResolution)
+        if(showProgress):
+            probabilitiesIterator = tqdm(probabilities, desc="Current p")
         else:
-            for perturbationIndex in trange(0, perturbationCount, desc="Perturbation", leave=False):
-                args = (nodeCount, edges, directed,
-                        probability, detectionTrials)
-                newTrivialCount, allDLDetected, allDLTrivial = calculatePerturbedTrivialCount(
-                    args)
-                trivialCount += newTrivialCount
-                DLCurvesTrivial[probabilityIndex, perturbationIndex *
-                                detectionTrials:(perturbationIndex+1)*detectionTrials] = allDLTrivial
-                DLCurvesDetected[probabilityIndex, perturbationIndex *
-                                 detectionTrials:(perturbationIndex+1)*detectionTrials] = allDLDetected
-                perturbationIndex += 1
-            TPRCurve[probabilityIndex] = trivialCount / \
-                (perturbationCount*detectionTrials)
+            probabilitiesIterator = probabilities
+        for probabilityIndex, probability in enumerate(probabilitiesIterator):
+            TPRCurve[probabilityIndex], DLCurvesTrivial[probabilityIndex], \
+                DLCurvesDetected[probabilityIndex] = calculateCurvePoint(probability)
     if(useMultiprocessing):
-        # pool.terminate()
-        pool.close()
-        pool.join()
-    RModularity = 1.0-np.trapz(TPRCurve, probabilities)
+        closePool(pool, abandonTasks=(
+            taskTimeout is not None or speculativeFactor is not None),
+            manager=manager)
+    RModularity = 1.0-trapezoid(TPRCurve, probabilities)
 
     if(outputCurves):
-        return (RModularity, probabilities, TPRCurve, DLCurvesTrivial, DLCurvesDetected)
+        return RModularityResult(
+            RModularity, probabilities, TPRCurve, DLCurvesTrivial, DLCurvesDetected,
+            metadata={"perturbationCount": perturbationCount,
+                      "detectionTrials": detectionTrials,
+                      "directed": bool(directed),
+                      "seed": int(seed) if seed is not None else None})
     else:
         return RModularity
 
 
 def modularityNullmodel(args):
-    network, detectionTrials = args
-    networkConfig = ig.Graph.Degree_Sequence(
-        network.degree()).simplify().components(mode="weak").giant()
-    return calculateMaxModularity(networkConfig, trials=detectionTrials)
+    network, detectionTrials, taskSeed = args
+    seedSequence, attempt = splitTaskSeed(taskSeed)
+    # Extra attempts keep the nullmodel realization
+    configSeedSequence, _ = spawnSeedSequences(seedSequence, 2)
+    _, detectionSeedSequence = spawnSeedSequences(
+        attemptSeedSequence(seedSequence, attempt), 2)
+    # igraph uses the random module as random number generator,
+    # its state is restored afterwards for the caller.
+    randomState = random.getstate()
+    random.seed(seedFromSequence(configSeedSequence))
+    try:
+        networkConfig = ig.Graph.Degree_Sequence(
+            network.degree()).simplify().components(mode="weak").giant()
+    finally:
+        random.setstate(randomState)
+    return calculateMaxModularity(networkConfig, trials=detectionTrials,
+                                  seedSequence=detectionSeedSequence)
 
 
 def modularityDifference(
@@ -215,7 +807,8 @@ def modularityDifference(
     nullmodelCount=100,
     detectionTrialsNullModel=10,
     showProgress=True,
-    useMultiprocessing=True
+    useMultiprocessing=True,
+    seed=None
 ):
     """
         Computes the Modularity Difference of a network.
@@ -230,32 +823,41 @@ def modularityDifference(
         Whether the network is directed or not.
     detectionTrials : int, optional
         The number of times to perform community
-        detection for each perturbed network.
-        (defaults to 10)
+        detection for the network.
+        (defaults to 100)
     nullmodelCount : int, optional
         The number of times to perform community
         detection using nullmodels.
-        (defaults to 200)
+        (defaults to 100)
     detectionTrialsNullModel : int, optional
         The number of times to perform community
         detection for each nullmodel realization.
-        (defaults to 200)
+        (defaults to 10)
     showProgress : bool, optional
         Shows a progress bar if enabled.
         (defaults to True)
+    seed : int, optional
+        Seed used to derive independent random streams for
+        the network and each nullmodel realization.
+        (defaults to None, random seed)
     Returns
     -------
     float 
         The Modularity Difference of the network.
     """
+    rootEntropy = np.random.SeedSequence(seed).entropy
     network = ig.Graph(nodeCount, edges, directed=directed).simplify(
     ).components(mode="weak").giant()
-    modularity = calculateMaxModularity(network, trials=detectionTrials)
+    modularity = calculateMaxModularity(
+        network, trials=detectionTrials,
+        seedSequence=modularitySeedSequence(rootEntropy))
     if(useMultiprocessing):
         num_processors = mp.cpu_count()
     nullModelModularities = []
     if(useMultiprocessing):
-        allArgs = [(network, detectionTrials)]*nullmodelCount
+        allArgs = [(network, detectionTrialsNullModel,
+                    modularitySeedSequence(rootEntropy, nullmodelIndex))
+                   for nullmodelIndex in range(nullmodelCount)]
         pool = mp.Pool(processes=num_processors)
         for nullModelModularity in tqdm(pool.imap_unordered(func=modularityNullmodel, iterable=allArgs), total=len(allArgs), desc="NullModel"):
             nullModelModularities.append(nullModelModularity)
@@ -265,18 +867,21 @@ def modularityDifference(
         nullModelIterator = range(nullmodelCount)
         if(showProgress):
             nullModelIterator = tqdm(nullModelIterator, desc="Nullmodel")
-        for _ in nullModelIterator:
+        for nullmodelIndex in nullModelIterator:
             nullModelModularity = modularityNullmodel(
-                (network, detectionTrials))
+                (network, detectionTrialsNullModel,
+                 modularitySeedSequence(rootEntropy, nullmodelIndex)))
             nullModelModularities.append(nullModelModularity)
     modularityDifference = modularity - np.mean(nullModelModularities)
     return modularityDifference
 
 
+@restoresGraphToolThreads
 def informationModularity(
         nodeCount,
         edges,
-        directed=False):
+        directed=False,
+        seed=None):
     """
         Computes the Information Modularity of a network.
 
@@ -288,17 +893,273 @@ def informationModularity(
         A list of the edges in the network.
     directed : int, optional
         Whether the network is directed or not.
+    seed : int, optional
+        Seed used for the community detection. When a seed is
+        given, graph-tool runs single-threaded.
+        (defaults to None, random seed)
     Returns
     -------
     float 
         The Information Modularity of the network.
     """
+    if(seed is not None):
+        # Multithreaded fits are not reproducible
+        gtOpenmp_set_num_threads(1)
+        seed = seedFromSequence(np.random.SeedSequence(seed))
     _, DLDetected, DLTrivial = SBMMinimizeMembership(
-        nodeCount, edges, directed)
+        nodeCount, edges, directed, seed=seed)
     return 1-(DLDetected/DLTrivial)
 
 
+def analyzeTask(task):
+    kind, key, args = task
+    if(kind == "SBM"):
+        result = calculatePerturbedTrivialCount(args)
+    elif(kind == "modularity"):
+        network, detectionTrials, taskSeed = args
+        result = calculateMaxModularity(
+            network, trials=detectionTrials,
+            seedSequence=attemptSeedSequence(*splitTaskSeed(taskSeed)))
+    else:
+        result = modularityNullmodel(args)
+    return kind, key, result
+
+
+def reseedAnalyzeTask(task, attempt):
+    kind, key, args = task
+    return kind, key, reseedTaskArgs(args, attempt)
+
+
+@restoresGraphToolThreads
+def analyze(
+    nodeCount,
+    edges,
+    directed=False,
+    metrics=("Q_r", "Q_DL", "Q_diff"),
+    perturbationCount=24,
+    detectionTrials=1,
+    rewireResolution=51,
+    modularityTrials=100,
+    nullmodelCount=100,
+    detectionTrialsNullModel=10,
+    outputCurves=False,
+    showProgress=True,
+    useMultiprocessing=True,
+    taskTimeout=None,
+    speculativeFactor=None,
+    stragglerStats=None,
+    seed=None,
+    curvesDType=None
+):
+    """
+    Computes any subset of the Robustness Modularity (Q_r),
+    Information Modularity (Q_DL) and Modularity Difference
+    (Q_diff) of a network in a single pass. The giant component
+    is extracted once and all the SBM and Louvain tasks are
+    scheduled together on the same pool. The SBM fits of the
+    p=0 perturbations (which are identical to the original
+    network) are reused to calculate Q_DL.
+
+    Q_diff is the same as the one of modularityDifference (with
+    modularityTrials as detectionTrials). Q_DL differs from the
+    one of informationModularity, which fits the whole network
+    once, while here Q_DL is the average over the fits of the
+    giant component at p=0: perturbationCount*detectionTrials
+    fits if Q_r is also requested, otherwise detectionTrials fits.
+
+    Parameters
+    ----------
+    nodeCount : int
+        The number of nodes in the network.
+    edges : list of tuples
+        A list of the edges in the network.
+    directed : int, optional
+        Whether the network is directed or not.
+    metrics : iterable of str, optional
+        The metrics to calculate, any of "Q_r", "Q_DL"
+        and "Q_diff".
+        (defaults to all of them)
+    perturbationCount : int, optional
+        The number of perturbations to perform for each
+        rewire probability (Q_r).
+        (defaults to 24)
+    detectionTrials : int, optional
+        The number of times to perform community
+        detection for each perturbed network (Q_r and Q_DL).
+        (defaults to 1)
+    rewireResolution : int, optional
+        The number values points for the rewire
+        probabilities (from 0 to 1) to calculate
+        the Trivial Partition Ratio (TPR) curves (Q_r).
+        (defaults to 51)
+    modularityTrials : int, optional
+        The number of times to perform community
+        detection for the input network (Q_diff).
+        (defaults to 100)
+    nullmodelCount : int, optional
+        The number of realizations of the null-model (Q_diff).
+        (defaults to 100)
+    detectionTrialsNullModel : int, optional
+        The number of times to perform community
+        detection for each nullmodel realization (Q_diff).
+        (defaults to 10)
+    outputCurves : bool, optional
+        Whether to also return the TPR and DL curves.
+        (defaults to False)
+    showProgress : bool, optional
+        Shows a progress bar if enabled.
+        (defaults to True)
+    useMultiprocessing: bool, optional
+        Uses parallel processing to run the tasks.
+        (defaults to True)
+    taskTimeout : float, optional
+        Time budget in seconds for each task. Tasks
+        exceeding it are executed again and the first result
+        to finish is used (only with multiprocessing).
+        (defaults to None, no timeout)
+    speculativeFactor : float, optional
+        Once the rest of a batch is done, tasks running for more
+        than speculativeFactor times the median duration of the
+        same kind of task (SBM fit, Louvain detection or nullmodel)
+        are executed again and the first result to finish is used
+        (only with multiprocessing).
+        (defaults to None, no speculative execution)
+    stragglerStats : dict, optional
+        If provided, it is updated with the counts of "tasks",
+        "timeouts", "speculative" (extra copies launched) and
+        "speculativeWins" (tasks won by an extra copy).
+        (defaults to None)
+    seed : int, optional
+        Seed used to derive independent random streams for each
+        task. The perturbations are the same as the ones of
+        RModularity with the same seed.
+        (defaults to None, random seed)
+    curvesDType : numpy dtype, optional
+        The dtype used to store the DL curves, e.g., np.float32
+        to halve their memory.
+        (defaults to None, np.float64)
+    Returns
+    -------
+    dict
+        Dictionary with the requested metrics as keys ("Q_r",
+        "Q_DL" and/or "Q_diff"). If outputCurves is True and
+        Q_r is requested, it also contains the entry "result"
+        (RModularityResult, same as returned by RModularity) and
+        the entries "probabilities", "TPRCurve", "DLCurvesTrivial"
+        and "DLCurvesDetected".
+    """
+    metrics = set(metrics)
+    unknownMetrics = metrics-{"Q_r", "Q_DL", "Q_diff"}
+    if(unknownMetrics):
+        raise ValueError("Unknown metrics: %s" %
+                         ", ".join(sorted(unknownMetrics)))
+
+    rootEntropy = np.random.SeedSequence(seed).entropy
+    (nodeCount, edges) = getMajorConnectedComponent(
+        nodeCount, edges, directed)
+
+    # Q_DL alone only needs the fits for the original network (p=0)
+    if("Q_r" in metrics):
+        probabilities = np.linspace(0, 1, rewireResolution)
+        SBMPerturbationCount = perturbationCount
+    elif("Q_DL" in metrics):
+        probabilities = np.array([0.0])
+        SBMPerturbationCount = 1
+    else:
+        probabilities = np.array([])
+        SBMPerturbationCount = 0
+
+    SBMTasks = [("SBM", (probabilityIndex, perturbationIndex),
+                 (nodeCount, edges, directed, probability, detectionTrials, None,
+                  perturbationSeedSequence(rootEntropy, probability, perturbationIndex)))
+                for probabilityIndex, probability in enumerate(probabilities)
+                for perturbationIndex in range(SBMPerturbationCount)]
+    louvainTasks = []
+    if("Q_diff" in metrics):
+        # getMajorConnectedComponent already simplifies the network
+        network = ig.Graph(nodeCount, edges, directed=directed)
+        louvainTasks.append(("modularity", 0, (
+            network, modularityTrials, modularitySeedSequence(rootEntropy))))
+        louvainTasks += [("nullmodel", nullmodelIndex,
+                          (network, detectionTrialsNullModel,
+                           modularitySeedSequence(rootEntropy, nullmodelIndex)))
+                         for nullmodelIndex in range(nullmodelCount)]
+
+    # Interleaving both streams so that they overlap in the pool
+    allTasks = []
+    for taskIndex in range(max(len(SBMTasks), len(louvainTasks))):
+        if(taskIndex < len(louvainTasks)):
+            allTasks.append(louvainTasks[taskIndex])
+        if(taskIndex < len(SBMTasks)):
+            allTasks.append(SBMTasks[taskIndex])
+
+    if(useMultiprocessing or seed is not None):
+        # Disabling internal multithreading of graph_tool
+        # (also required for reproducible fits)
+        gtOpenmp_set_num_threads(1)
+    if(useMultiprocessing):
+        num_processors = mp.cpu_count()
+        pool = mp.Pool(processes=num_processors)
+        tasksIterator = runPoolTasks(
+            pool, analyzeTask, allTasks, num_processors,
+            taskTimeout=taskTimeout, speculativeFactor=speculativeFactor,
+            reseedArgs=reseedAnalyzeTask, stragglerStats=stragglerStats,
+            durationKey=lambda task: task[0])
+    else:
+        tasksIterator = enumerate(map(analyzeTask, allTasks))
+    if(showProgress):
+        tasksIterator = tqdm(tasksIterator, total=len(allTasks), desc="Tasks")
 
+    trivialCounts = np.zeros(len(probabilities))
+    DLCurvesDetected = np.zeros(
+        (len(probabilities), detectionTrials*SBMPerturbationCount), dtype=curvesDType)
+    DLCurvesTrivial = np.zeros(
+        (len(probabilities), detectionTrials*SBMPerturbationCount), dtype=curvesDType)
+    modularity = None
+    nullModelModularities = []
+    for _, (kind, key, result) in tasksIterator:
+        if(kind == "SBM"):
+            probabilityIndex, perturbationIndex = key
+            newTrivialCount, allDLDetected, allDLTrivial, _ = result
+            trivialCounts[probabilityIndex] += newTrivialCount
+            DLCurvesTrivial[probabilityIndex, perturbationIndex *
+                            detectionTrials:(perturbationIndex+1)*detectionTrials] = allDLTrivial
+            DLCurvesDetected[probabilityIndex, perturbationIndex *
+                             detectionTrials:(perturbationIndex+1)*detectionTrials] = allDLDetected
+        elif(kind == "modularity"):
+            modularity = result
+        else:
+            nullModelModularities.append(result)
+
+    if(useMultiprocessing):
+        closePool(pool, abandonTasks=(
+            taskTimeout is not None or speculativeFactor is not None))
+
+    results = {}
+    if("Q_r" in metrics):
+        TPRCurve = trivialCounts/(SBMPerturbationCount*detectionTrials)
+        results["Q_r"] = 1.0-trapezoid(TPRCurve, probabilities)
+        if(outputCurves):
+            results["result"] = RModularityResult(
+                results["Q_r"], probabilities, TPRCurve, DLCurvesTrivial, DLCurvesDetected,
+                metadata={"perturbationCount": perturbationCount,
+                          "detectionTrials": detectionTrials,
+                          "directed": bool(directed),
+                          "seed": int(seed) if seed is not None else None})
+            results["probabilities"] = probabilities
+            results["TPRCurve"] = TPRCurve
+            results["DLCurvesTrivial"] = DLCurvesTrivial
+            results["DLCurvesDetected"] = DLCurvesDetected
+    if("Q_DL" in metrics):
+        results["Q_DL"] = np.mean(
+            1-(DLCurvesDetected[0].astype(np.float64)/DLCurvesTrivial[0]))
+    if("Q_diff" in metrics):
+        results["Q_diff"] = modularity - np.mean(nullModelModularities)
+    return results
+
+
+
+@restoresGraphToolThreads
 def RModularityFast_alt(
     nodeCount,
     edges,
@@ -311,6 +1172,7 @@ def RModularityFast_alt(
     coarseError = 0.02,
     fineError=0.01,
     minSimilarTrials=3,
+    seed=None,
 ):
     """
     Alternative implementation of the fast algorithm (currently unsupported)
@@ -341,6 +1203,10 @@ def RModularityFast_alt(
         Uses parallel processing to calculate
         Rmodularity.
         (defaults to True)
+    seed : int, optional
+        Seed used to derive independent random streams for
+        each perturbation.
+        (defaults to None, random seed)
     Returns
     -------
     float 
@@ -350,6 +1216,9 @@ def RModularityFast_alt(
         the Robustness Modularity, the rewire probabilities, the TPR curves, the Description
         lenghts for the detected and trivial partitions.
     """
+    rootEntropy = np.random.SeedSequence(seed).entropy
+    rng = np.random.default_rng(
+        np.random.SeedSequence(rootEntropy, spawn_key=(3,)))
     TPRCurve = []
     DLCurvesDetected = []
     DLCurvesTrivial = []
@@ -358,21 +1227,24 @@ def RModularityFast_alt(
 
     (nodeCount, edges) = getMajorConnectedComponent(
         nodeCount, edges, directed)
-    if(useMultiprocessing):
-        num_processors = mp.cpu_count()
+    if(useMultiprocessing or seed is not None):
         # Disabling internal multithreading of graph_tool
+        # (also required for reproducible fits)
         gtOpenmp_set_num_threads(1)
+    if(useMultiprocessing):
+        num_processors = mp.cpu_count()
     def calculateTPR(probability):
         trivialCount = 0
         DLCurvesDetectedSingle = np.zeros(detectionTrials*perturbationCount)
         DLCurvesTrivialSingle = np.zeros(detectionTrials*perturbationCount)
         if(useMultiprocessing):
-            allArgs = [(nodeCount, edges, directed, probability,
-                        detectionTrials)]*perturbationCount
+            allArgs = [(nodeCount, edges, directed, probability, detectionTrials, None,
+                        perturbationSeedSequence(rootEntropy, probability, perturbationIndex))
+                       for perturbationIndex in range(perturbationCount)]
             perturbationIndex = 0
 
             pool = mp.Pool(processes=num_processors)
-            for newTrivialCount, allDLDetected, allDLTrivial in \
+            for newTrivialCount, allDLDetected, allDLTrivial, _ in \
                 tqdm(
                     pool.imap_unordered(
                         func=calculatePerturbedTrivialCount,
@@ -390,8 +1262,9 @@ def RModularityFast_alt(
         else:
             for perturbationIndex in trange(0, perturbationCount, desc="Perturbation", leave=False):
                 args = (nodeCount, edges, directed,
-                        probability, detectionTrials)
-                newTrivialCount, allDLDetected, allDLTrivial = calculatePerturbedTrivialCount(
+                        probability, detectionTrials, None,
+                        perturbationSeedSequence(rootEntropy, probability, perturbationIndex))
+                newTrivialCount, allDLDetected, allDLTrivial, _ = calculatePerturbedTrivialCount(
                     args)
                 DLCurvesDetectedSingle[perturbationIndex*detectionTrials:(perturbationIndex+1)*detectionTrials] = allDLDetected
                 DLCurvesTrivialSingle[perturbationIndex*detectionTrials:(perturbationIndex+1)*detectionTrials] = allDLTrivial
@@ -416,7 +1289,7 @@ def RModularityFast_alt(
         TPRCurve = [ TPRCurve[i] for i in sortedOrder ]
         DLCurvesDetected = [ DLCurvesDetected[i] for i in sortedOrder ]
         DLCurvesTrivial = [ DLCurvesTrivial[i] for i in sortedOrder ]
-        currentRModularity = 1.0-np.trapz(TPRCurve, probabilities)
+        currentRModularity = 1.0-trapezoid(TPRCurve, probabilities)
         absDiff = abs(currentRModularity-lastRModularity)/lastRModularity
         lastRModularity = currentRModularity
         if(absDiff < targetError):
@@ -451,7 +1324,7 @@ def RModularityFast_alt(
                 
 
     while(similarTrial<minSimilarTrials):
-        probability=random.random()*(fineRange[1]-fineRange[0])+fineRange[0]
+        probability=rng.random()*(fineRange[1]-fineRange[0])+fineRange[0]
         absDiff = addPointProbability(probability,fineError)
         pbar.set_description("FINE Phase. Deviation: %g (target=%g) Trials" % (absDiff,fineError))
         pbar.reset()
@@ -464,6 +1337,7 @@ def RModularityFast_alt(
         return currentRModularity
 
 
+@restoresGraphToolThreads
 def RModularityFast(
     nodeCount,
     edges,
@@ -476,6 +1350,18 @@ def RModularityFast(
     fineError=0.01,
     coarseError = 0.02,
     minSimilarTrials=2,
+    taskTimeout=None,
+    speculativeFactor=None,
+    stragglerStats=None,
+    TPRLookupTable=None,
+    TPRLookupCheckCount=0,
+    seed=None,
+    screening=False,
+    screeningZScores=(1.0, 10.0),
+    screeningNullmodelCount=10,
+    screeningDetectionTrials=3,
+    screeningCalibrationRate=0.05,
+    screeningReport=None
 ):
     """
     Computes the approximated Robustness Modularity of a network
@@ -518,6 +1404,73 @@ def RModularityFast(
         The minimum number of similar trials to perform before 
         stopping the Monte-Carlo approach.
         (defaults to 2)
+    taskTimeout : float, optional
+        Time budget in seconds for each perturbation task. Tasks
+        exceeding it are executed again and the first result
+        to finish is used (only with multiprocessing).
+        (defaults to None, no timeout)
+    speculativeFactor : float, optional
+        Once the rest of a batch is done, tasks running for more
+        than speculativeFactor times the median task duration are
+        executed again and the first result to finish is used
+        (only with multiprocessing).
+        (defaults to None, no speculative execution)
+    stragglerStats : dict, optional
+        If provided, it is updated with the counts of "tasks",
+        "timeouts", "speculative" (extra copies launched) and
+        "speculativeWins" (tasks won by an extra copy).
+        (defaults to None)
+    TPRLookupTable : str, path-like or dict, optional
+        Path to a TPR lookup table file or a table loaded by
+        loadTPRTable. The coarse probe at p=1 is skipped if it is
+        saturated (TPR=1) for random networks of similar size.
+        (defaults to None)
+    TPRLookupCheckCount : int, optional
+        Number of perturbations still calculated at a saturated
+        probability to check the lookup table. If any of them
+        is not trivial, all the perturbations are calculated.
+        (defaults to 0)
+    seed : int, optional
+        Seed used to derive independent random streams for
+        the sampled probabilities and each perturbation.
+        When a seed is given, graph-tool runs single-threaded (as
+        when using multiprocessing). Reproducibility requires no
+        timeouts or speculative copies.
+        (defaults to None, random seed)
+    screening : bool, optional
+        Screens each perturbed network using the z-score of its
+        maximum Louvain modularity against configuration model
+        realizations. Networks with z-score above the structured
+        threshold are counted as non-trivial, networks below the
+        random threshold are counted as trivial and the full
+        SBM fit is only performed for the remaining networks.
+        Screening is disabled for directed networks.
+        (defaults to False)
+    screeningZScores : (float, float), optional
+        The (random, structured) z-score thresholds used for
+        screening.
+        (defaults to (1.0, 10.0))
+    screeningNullmodelCount : int, optional
+        The number of configuration model realizations used to
+        calculate the z-score of each perturbed network.
+        (defaults to 10)
+    screeningDetectionTrials : int, optional
+        The number of Louvain detections used to find the maximum
+        modularity of each network (and null model realization).
+        (defaults to 3)
+    screeningCalibrationRate : float, optional
+        Fraction of the screened (decided) networks for which the
+        full SBM fit is still performed and used, in order to
+        check the screen.
+        (defaults to 0.05)
+    screeningReport : dict, optional
+        If provided, it is updated with the counts of "screened",
+        "structured", "random" and "ambiguous" networks, of
+        "calibrated" networks and their "calibrationDetections",
+        and of the "disagreements" (also "structuredDisagreements"
+        and "randomDisagreements") between the screen and the full
+        SBM fit, as well as the "disagreementRate".
+        (defaults to None)
     Returns
     -------
     float 
@@ -526,48 +1479,70 @@ def RModularityFast(
     
     sortedOrder = []
 
+    if(isinstance(TPRLookupTable, (str, os.PathLike))):
+        TPRLookupTable = loadTPRTable(TPRLookupTable)
+    rootEntropy = np.random.SeedSequence(seed).entropy
+    rng = np.random.default_rng(
+        np.random.SeedSequence(rootEntropy, spawn_key=(3,)))
+    screeningArgs = None
+    # The screen (undirected modularity and nullmodel) does not
+    # apply to directed networks
+    if(screening and not directed):
+        screeningArgs = (*screeningZScores, screeningNullmodelCount,
+                         screeningDetectionTrials, screeningCalibrationRate)
     (nodeCount, edges) = getMajorConnectedComponent(
         nodeCount, edges, directed)
-    if(useMultiprocessing):
-        num_processors = mp.cpu_count()
+    if(useMultiprocessing or seed is not None):
         # Disabling internal multithreading of graph_tool
+        # (also required for reproducible fits)
         gtOpenmp_set_num_threads(1)
+    if(useMultiprocessing):
+        num_processors = mp.cpu_count()
         pool = mp.Pool(processes=num_processors)
-    def calculateTPR(probabilities):
+        manager, taskStartTimes = startTaskTracking(
+            taskTimeout, speculativeFactor)
+    def calculateTPR(probabilities, firstIndex=0):
         trivialCount = 0
         #check if probabilities is a number
         if(isinstance(probabilities,float) or isinstance(probabilities,int)):
             probabilities = [probabilities]*perturbationCount
 
+        allArgs = [(nodeCount, edges, directed, probability, detectionTrials, screeningArgs,
+                    perturbationSeedSequence(rootEntropy, probability, index))
+                   for index, probability in enumerate(probabilities, firstIndex)]
         if(useMultiprocessing):
-            allArgs = [(nodeCount, edges, directed, probability,
-                        detectionTrials) for index, probability in enumerate(probabilities)]
             perturbationIndex = 0
 
-            poolIterator = pool.imap_unordered(
-                                func=calculatePerturbedTrivialCount,
-                                iterable=allArgs
+            poolIterator = runPoolTasks(
+                                pool, calculatePerturbedTrivialCount,
+                                allArgs, num_processors,
+                                taskTimeout=taskTimeout,
+                                speculativeFactor=speculativeFactor,
+                                reseedArgs=reseedTaskArgs,
+                                stragglerStats=stragglerStats,
+                                taskStartTimes=taskStartTimes
                             )
             if(showProgress):
                 poolIterator = tqdm(poolIterator, 
                     total=len(allArgs),
                     desc="Perturbation", leave=False
                 )
-            for newTrivialCount, allDLDetected, allDLTrivial in poolIterator:
+            for _, (newTrivialCount, allDLDetected, allDLTrivial, screeningResult) in poolIterator:
                 trivialCount += newTrivialCount
+                updateScreeningReport(screeningReport, screeningResult,
+                                      newTrivialCount, detectionTrials)
                 perturbationIndex += 1
             # pool.terminate()
             # pool.close()
         else:
-            for perturbationIndex,probability in enumerate(trange(0, probabilities, desc="Perturbation", leave=False)):
-                args = (nodeCount, edges, directed,
-                        probability, detectionTrials)
-                newTrivialCount, allDLDetected, allDLTrivial = calculatePerturbedTrivialCount(
+            for args in tqdm(allArgs, desc="Perturbation", leave=False, disable=not showProgress):
+                newTrivialCount, allDLDetected, allDLTrivial, screeningResult = calculatePerturbedTrivialCount(
                     args)
                 trivialCount += newTrivialCount
-                perturbationIndex += 1
+                updateScreeningReport(screeningReport, screeningResult,
+                                      newTrivialCount, detectionTrials)
         TPRValue = trivialCount / \
-            (perturbationCount*detectionTrials)
+            (len(probabilities)*detectionTrials)
         return TPRValue
     
     similarTrial = 0
@@ -579,7 +1554,20 @@ def RModularityFast(
         pbar.set_description("COARSE phase. Calculating TPR for 0.0 to 1.0.")
     currentDeviation = 1.0
     if(useCoarseStep):
-        currentTPRs = [calculateTPR(0.0),calculateTPR(1.0)]
+        if(isSaturatedProbability(TPRLookupTable, nodeCount, len(edges), directed, 1.0)):
+            # Only a few perturbations (if any) are calculated
+            # to check the TPR from the lookup table.
+            checkCount = min(TPRLookupCheckCount, perturbationCount)
+            saturatedTPR = 1.0
+            if(checkCount > 0):
+                saturatedTPR = calculateTPR([1.0]*checkCount)
+            if(saturatedTPR < 1.0 and checkCount < perturbationCount):
+                remainingCount = perturbationCount-checkCount
+                saturatedTPR = (saturatedTPR*checkCount+remainingCount*calculateTPR(
+                    [1.0]*remainingCount, firstIndex=checkCount))/perturbationCount
+            currentTPRs = [calculateTPR(0.0),saturatedTPR]
+        else:
+            currentTPRs = [calculateTPR(0.0),calculateTPR(1.0)]
         # print("\n----\nCURRENT TPRS: ",currentTPRs)
         threshold = 1.0
         if(currentTPRs[0]<1.0 and currentTPRs[1]==1.0):
@@ -597,15 +1585,16 @@ def RModularityFast(
                     break
         elif(currentTPRs[0]==1.0):
             if(useMultiprocessing):
-                pool.close()
-                pool.join()
+                closePool(pool, abandonTasks=(
+                    taskTimeout is not None or speculativeFactor is not None),
+                    manager=manager)
             return 0.0
     oldTPR = -1
     trivialCount= 0
     allPerturbationCount = 0
     # print("\n----\nCURRENT PROBABILITIES RANGE: ",currentProbabilitiesRange)
     while(similarTrial<minSimilarTrials):
-        probabilities=np.random.random(perturbationCount)*(currentProbabilitiesRange[1])
+        probabilities=rng.random(perturbationCount)*(currentProbabilitiesRange[1])
         trivialCount += perturbationCount*detectionTrials*calculateTPR(probabilities)
         allPerturbationCount += perturbationCount*detectionTrials
         newTPR = 1.0-trivialCount/allPerturbationCount
@@ -632,7 +1621,8 @@ def RModularityFast(
         pbar.refresh()
         pbar.close()
     if(useMultiprocessing):
-        pool.close()
-        pool.join()
+        closePool(pool, abandonTasks=(
+            taskTimeout is not None or speculativeFactor is not None),
+            manager=manager)
     return currentProbabilitiesRange[1]*(1.0-trivialCount/allPerturbationCount)
 
@@ -0,0 +1,309 @@
+
+
+import json
+import os
+import numpy as np
+
+
+curveArrayNames = ("probabilities", "TPRCurve",
+                   "DLCurvesTrivial", "DLCurvesDetected")
+resultMetadataFile = "result.json"
+
+
+def rowStatistics(rows):
+    # Average and standard deviation of each row (ignoring NaN entries).
+    # Rows are processed one at a time, so memory-mapped or streamed
+    # curves are never fully loaded into memory.
+    averages = []
+    deviations = []
+    for values in rows:
+        values = np.asarray(values, dtype=np.float64)
+        if(np.any(np.isfinite(values))):
+            averages.append(np.nanmean(values))
+            deviations.append(np.nanstd(values))
+        else:
+            averages.append(np.nan)
+            deviations.append(np.nan)
+    return np.array(averages), np.array(deviations)
+
+
+def DLDifferenceRows(trivialRows, detectedRows):
+    for DLTrivial, DLDetected in zip(trivialRows, detectedRows):
+        DLTrivial = np.asarray(DLTrivial, dtype=np.float64)
+        DLDetected = np.asarray(DLDetected, dtype=np.float64)
+        yield (DLTrivial-DLDetected)/DLTrivial
+
+
+def archiveRows(archive, name):
+    # Reads a 2D array of an ".npz" archive one row at a time
+    with archive.zip.open("%s.npy" % name) as fd:
+        version = np.lib.format.read_magic(fd)
+        if(version == (1, 0)):
+            shape, fortranOrder, dtype = np.lib.format.read_array_header_1_0(fd)
+        else:
+            shape, fortranOrder, dtype = np.lib.format.read_array_header_2_0(fd)
+        if(fortranOrder or len(shape) != 2):
+            yield from archive[name]
+            return
+        rowBytes = shape[1]*dtype.itemsize
+        for _ in range(shape[0]):
+            yield np.frombuffer(fd.read(rowBytes), dtype=dtype)
+
+
+class RModularityResult:
+    """
+    Robustness Modularity of a network together with its TPR and
+    DL curves. It can be unpacked as the tuple (RModularity,
+    probabilities, TPRCurve, DLCurvesTrivial, DLCurvesDetected).
+
+    Parameters
+    ----------
+    RModularity : float
+        The Robustness Modularity of the network.
+    probabilities : np.array dim=1
+        The rewire probabilities.
+    TPRCurve : np.array dim=1
+        The TPR for each rewire probability.
+    DLCurvesTrivial : np.array dim=2
+        The description lengths of the trivial partitions, one
+        row for each rewire probability.
+    DLCurvesDetected : np.array dim=2
+        The description lengths of the detected partitions, one
+        row for each rewire probability.
+    curvesDType : numpy dtype, optional
+        The dtype used to store the DL curves, e.g., np.float32
+        to halve the memory. The summary statistics are always
+        calculated in double precision.
+        (defaults to None, keeps the dtype of the curves)
+    metadata : dict, optional
+        JSON serializable information about the run (e.g.,
+        parameters) stored together with the curves.
+        (defaults to None)
+    """
+
+    def __init__(
+        self,
+        RModularity,
+        probabilities,
+        TPRCurve,
+        DLCurvesTrivial,
+        DLCurvesDetected,
+        curvesDType=None,
+        metadata=None
+    ):
+        self.RModularity = float(RModularity)
+        self.probabilities = np.asarray(probabilities)
+        self.TPRCurve = np.asarray(TPRCurve)
+        # Memory-mapped curves are kept as they are (no copy)
+        DLCurvesTrivial = np.asanyarray(DLCurvesTrivial)
+        DLCurvesDetected = np.asanyarray(DLCurvesDetected)
+        if(curvesDType is None or DLCurvesTrivial.dtype == curvesDType):
+            self.DLCurvesTrivial = DLCurvesTrivial
+        else:
+            self.DLCurvesTrivial = DLCurvesTrivial.astype(curvesDType)
+        if(curvesDType is None or DLCurvesDetected.dtype == curvesDType):
+            self.DLCurvesDetected = DLCurvesDetected
+        else:
+            self.DLCurvesDetected = DLCurvesDetected.astype(curvesDType)
+        self.metadata = dict(metadata) if metadata is not None else {}
+        self._statistics = {}
+
+    def __iter__(self):
+        return iter((self.RModularity, self.probabilities, self.TPRCurve,
+                     self.DLCurvesTrivial, self.DLCurvesDetected))
+
+    def __len__(self):
+        return 5
+
+    def __getitem__(self, index):
+        return tuple(self)[index]
+
+    def __repr__(self):
+        return "RModularityResult(RModularity=%g, probabilities=%d, samples=%d, dtype=%s)" % (
+            self.RModularity, len(self.probabilities),
+            self.DLCurvesTrivial.shape[1] if self.DLCurvesTrivial.ndim == 2 else 0,
+            self.DLCurvesTrivial.dtype)
+
+    def _cachedStatistics(self, name, rows):
+        if(name not in self._statistics):
+            self._statistics[name] = rowStatistics(rows)
+        return self._statistics[name]
+
+    def DLTrivialStatistics(self):
+        """
+        Average and standard deviation of the description lengths
+        of the trivial partitions for each rewire probability.
+        NaN entries (perturbations not calculated) are ignored.
+
+        Returns
+        -------
+        (np.array dim=1, np.array dim=1)
+            The averages and standard deviations.
+        """
+        return self._cachedStatistics("DLTrivial", iter(self.DLCurvesTrivial))
+
+    def DLDetectedStatistics(self):
+        """
+        Average and standard deviation of the description lengths
+        of the detected partitions for each rewire probability.
+        NaN entries (perturbations not calculated) are ignored.
+
+        Returns
+        -------
+        (np.array dim=1, np.array dim=1)
+            The averages and standard deviations.
+        """
+        return self._cachedStatistics("DLDetected", iter(self.DLCurvesDetected))
+
+    def DLDifferenceStatistics(self):
+        """
+        Average and standard deviation of the relative difference
+        (DLTrivial-DLDetected)/DLTrivial for each rewire probability,
+        i.e., the information modularity along p. NaN entries
+        (perturbations not calculated) are ignored.
+
+        Returns
+        -------
+        (np.array dim=1, np.array dim=1)
+            The averages and standard deviations.
+        """
+        return self._cachedStatistics("DLDifference", DLDifferenceRows(
+            iter(self.DLCurvesTrivial), iter(self.DLCurvesDetected)))
+
+    def save(self, path, compressed=False):
+        """
+        Saves the result. If path ends with ".npz", the result is
+        saved as a single numpy archive. Otherwise, path is used as
+        a directory containing one ".npy" file for each curve and a
+        JSON file with the Robustness Modularity and metadata. Only
+        the directory layout can be memory-mapped by loadResult,
+        ".npz" archives are fully loaded into memory (except by
+        aggregateResults, which reads their curves row by row).
+
+        Parameters
+        ----------
+        path : str or path-like
+            Path to the ".npz" file or to the directory.
+        compressed : bool, optional
+            Compresses the ".npz" archive.
+            (defaults to False)
+        """
+        path = os.fspath(path)
+        arrays = {name: getattr(self, name) for name in curveArrayNames}
+        if(path.endswith(".npz")):
+            saveArchive = np.savez_compressed if compressed else np.savez
+            saveArchive(path, RModularity=np.array(self.RModularity),
+                        metadata=np.array(json.dumps(self.metadata)),
+                        **arrays)
+            return
+        os.makedirs(path, exist_ok=True)
+        for name, array in arrays.items():
+            np.save(os.path.join(path, "%s.npy" % name), array)
+        with open(os.path.join(path, resultMetadataFile), "w", encoding="utf8") as fd:
+            json.dump({"RModularity": self.RModularity,
+                       "metadata": self.metadata}, fd, indent=1)
+
+
+def loadResult(path, mmapMode="r"):
+    """
+    Loads a result saved by RModularityResult.save.
+
+    Parameters
+    ----------
+    path : str or path-like
+        Path to the ".npz" file or to the directory.
+    mmapMode : str, optional
+        Memory-map mode used to open the curves of a directory
+        (see numpy.load), so that they are only read from disk
+        when accessed. Use None to load them into memory. Not
+        used for ".npz" files, which are always loaded.
+        (defaults to "r")
+    Returns
+    -------
+    RModularityResult
+        The loaded result.
+    """
+    path = os.fspath(path)
+    if(path.endswith(".npz")):
+        with np.load(path) as archive:
+            return RModularityResult(
+                float(archive["RModularity"]),
+                *[archive[name] for name in curveArrayNames],
+                metadata=json.loads(str(archive["metadata"])))
+    with open(os.path.join(path, resultMetadataFile), "r", encoding="utf8") as fd:
+        resultData = json.load(fd)
+    arrays = [np.load(os.path.join(path, "%s.npy" % name), mmap_mode=mmapMode)
+              for name in curveArrayNames]
+    return RModularityResult(resultData["RModularity"], *arrays,
+                             metadata=resultData["metadata"])
+
+
+def aggregateResults(paths, DLStatistics=False):
+    """
+    Collects the Robustness Modularity and TPR curves of many
+    stored results. The DL matrices are only read if DLStatistics
+    is enabled, and then one row at a time (memory-mapped for
+    directories and streamed for ".npz" archives).
+
+    Parameters
+    ----------
+    paths : list of str or path-like
+        Paths to the results (".npz" files or directories).
+    DLStatistics : bool, optional
+        Also collects the average and standard deviation of the
+        DL difference curve of each result.
+        (defaults to False)
+    Returns
+    -------
+    dict
+        Dictionary with the entries "RModularity" (np.array dim=1),
+        "probabilities" and "TPRCurves" (lists of np.array dim=1),
+        "metadata" (list of dict) and, if DLStatistics is True,
+        "DLDifferenceAverages" and "DLDifferenceDeviations" (lists
+        of np.array dim=1). If all the results share the same
+        probabilities, the lists of curves are stacked as
+        np.array dim=2.
+    """
+    aggregated = {"RModularity": [], "probabilities": [],
+                  "TPRCurves": [], "metadata": []}
+    if(DLStatistics):
+        aggregated["DLDifferenceAverages"] = []
+        aggregated["DLDifferenceDeviations"] = []
+    for path in paths:
+        path = os.fspath(path)
+        if(path.endswith(".npz")):
+            # Arrays of the archive are only read when accessed
+            with np.load(path) as archive:
+                RModularity = float(archive["RModularity"])
+                probabilities = archive["probabilities"]
+                TPRCurve = archive["TPRCurve"]
+                metadata = json.loads(str(archive["metadata"]))
+                if(DLStatistics):
+                    averages, deviations = rowStatistics(DLDifferenceRows(
+                        archiveRows(archive, "DLCurvesTrivial"),
+                        archiveRows(archive, "DLCurvesDetected")))
+        else:
+            result = loadResult(path, mmapMode="r")
+            RModularity = result.RModularity
+            probabilities = np.array(result.probabilities)
+            TPRCurve = np.array(result.TPRCurve)
+            metadata = result.metadata
+            if(DLStatistics):
+                averages, deviations = result.DLDifferenceStatistics()
+            # Releasing the memory-mapped files
+            del result
+        aggregated["RModularity"].append(RModularity)
+        aggregated["probabilities"].append(probabilities)
+        aggregated["TPRCurves"].append(TPRCurve)
+        aggregated["metadata"].append(metadata)
+        if(DLStatistics):
+            aggregated["DLDifferenceAverages"].append(averages)
+            aggregated["DLDifferenceDeviations"].append(deviations)
+    aggregated["RModularity"] = np.array(aggregated["RModularity"])
+    allProbabilities = aggregated["probabilities"]
+    if(allProbabilities and all(
+            np.array_equal(probabilities, allProbabilities[0]) for probabilities in allProbabilities)):
+        for name in ("probabilities", "TPRCurves", "DLDifferenceAverages", "DLDifferenceDeviations"):
+            if(name in aggregated):
+                aggregated[name] = np.array(aggregated[name])
+    return aggregated
@@ -0,0 +1,387 @@
+
+
+import argparse
+import json
+import os
+import warnings
+import multiprocessing as mp
+import numpy as np
+from tqdm.auto import tqdm
+from .Threads import restoresGraphToolThreads
+
+
+def TPRTableKey(nodeCount, edgeCount, directed, probability):
+    return "%d,%d,%d,%.6f" % (nodeCount, edgeCount, int(bool(directed)), probability)
+
+
+def newTPRTable(minProbability=1.0, minSamples=96, sizeTolerance=0.1):
+    """
+    Creates an empty TPR lookup table.
+
+    Parameters
+    ----------
+    minProbability : float, optional
+        Only entries for rewire probabilities greater or equal
+        to this value are used to skip calculations. At p=1 the
+        perturbed network is a random graph that only depends on
+        the number of nodes and edges, thus only p=1 is used by
+        default.
+        (defaults to 1.0)
+    minSamples : int, optional
+        The minimum number of detections required to consider
+        a probability saturated.
+        (defaults to 96)
+    sizeTolerance : float, optional
+        Maximum relative difference between the number of nodes
+        (and edges) of the network and the table entries.
+        (defaults to 0.1)
+    Returns
+    -------
+    dict
+        The TPR lookup table.
+    """
+    return {
+        "entries": {},
+        "lookup": {
+            "minProbability": minProbability,
+            "minSamples": minSamples,
+            "sizeTolerance": sizeTolerance,
+        }
+    }
+
+
+def loadTPRTable(path, **lookupArgs):
+    """
+    Loads a TPR lookup table from a JSON file. If the
+    file does not exist, an empty table is returned.
+
+    Parameters
+    ----------
+    path : str or path-like
+        Path to the table file.
+    **lookupArgs
+        Lookup options passed to newTPRTable.
+    Returns
+    -------
+    dict
+        The TPR lookup table.
+    """
+    table = newTPRTable(**lookupArgs)
+    if(os.path.exists(path)):
+        with open(path, "r", encoding="utf8") as fd:
+            table["entries"] = json.load(fd)["entries"]
+    return table
+
+
+def saveTPRTable(table, path):
+    """
+    Saves a TPR lookup table to a JSON file.
+
+    Parameters
+    ----------
+    table : dict
+        The TPR lookup table.
+    path : str or path-like
+        Path to the table file.
+    """
+    temporaryPath = "%s.tmp" % path
+    with open(temporaryPath, "w", encoding="utf8") as fd:
+        json.dump({"entries": table["entries"]}, fd, indent=1, sort_keys=True)
+    os.replace(temporaryPath, path)
+
+
+def hasTPRSource(table, nodeCount, edgeCount, directed, probability, source):
+    """
+    Checks if the detections of a source (e.g., the entropy of
+    the seed used to measure them) were already added to an
+    entry of the TPR lookup table.
+
+    Parameters
+    ----------
+    table : dict
+        The TPR lookup table.
+    nodeCount : int
+        The number of nodes in the network.
+    edgeCount : int
+        The number of edges in the network.
+    directed : bool
+        Whether the network is directed or not.
+    probability : float
+        The rewire probability.
+    source : str
+        Identifier of the detections.
+    Returns
+    -------
+    bool
+        True if the source already contributed to the entry.
+    """
+    key = TPRTableKey(nodeCount, edgeCount, directed, probability)
+    entry = table["entries"].get(key, {})
+    return str(source) in entry.get("sources", [])
+
+
+def updateTPRTable(table, nodeCount, edgeCount, directed, probability, trivialCount, detectionCount, source=None):
+    """
+    Adds the trivial partitions counts of a set of detections
+    to the TPR lookup table. Detections of a source that already
+    contributed to the entry are not added again.
+
+    Parameters
+    ----------
+    table : dict
+        The TPR lookup table.
+    nodeCount : int
+        The number of nodes in the network.
+    edgeCount : int
+        The number of edges in the network.
+    directed : bool
+        Whether the network is directed or not.
+    probability : float
+        The rewire probability.
+    trivialCount : int
+        The number of detections resulting in trivial partitions.
+    detectionCount : int
+        The total number of detections.
+    source : str, optional
+        Identifier of the detections (e.g., the entropy of the
+        seed used to measure them), stored in the entry to
+        reject duplicates.
+        (defaults to None, not checked)
+    Returns
+    -------
+    bool
+        True if the counts were added, False if the source
+        already contributed to the entry.
+    """
+    if(source is not None and hasTPRSource(
+            table, nodeCount, edgeCount, directed, probability, source)):
+        return False
+    key = TPRTableKey(nodeCount, edgeCount, directed, probability)
+    entry = table["entries"].setdefault(key, {"trivial": 0, "total": 0})
+    entry["trivial"] += int(trivialCount)
+    entry["total"] += int(detectionCount)
+    if(source is not None):
+        entry.setdefault("sources", []).append(str(source))
+    return True
+
+
+def lookupTPR(table, nodeCount, edgeCount, directed, probability):
+    """
+    Finds the empirical TPR for networks of similar size in
+    the TPR lookup table.
+
+    Parameters
+    ----------
+    table : dict
+        The TPR lookup table.
+    nodeCount : int
+        The number of nodes in the network.
+    edgeCount : int
+        The number of edges in the network.
+    directed : bool
+        Whether the network is directed or not.
+    probability : float
+        The rewire probability.
+    Returns
+    -------
+    (float, int)
+        The TPR and the number of detections of all the entries
+        within the size tolerance. (None, 0) if there are no
+        entries.
+    """
+    sizeTolerance = table["lookup"]["sizeTolerance"]
+    trivialCount = 0
+    detectionCount = 0
+    for key, entry in table["entries"].items():
+        entryNodeCount, entryEdgeCount, entryDirected, entryProbability = key.split(",")
+        if(int(entryDirected) != int(bool(directed))
+           or not np.isclose(float(entryProbability), probability)):
+            continue
+        if(abs(int(entryNodeCount)-nodeCount) > sizeTolerance*nodeCount
+           or abs(int(entryEdgeCount)-edgeCount) > sizeTolerance*edgeCount):
+            continue
+        trivialCount += entry["trivial"]
+        detectionCount += entry["total"]
+    if(detectionCount == 0):
+        return (None, 0)
+    return (trivialCount/detectionCount, detectionCount)
+
+
+def isSaturatedProbability(table, nodeCount, edgeCount, directed, probability):
+    """
+    Checks if the TPR lookup table indicates that all the
+    detections at the rewire probability result in trivial
+    partitions (TPR=1) for networks of similar size.
+
+    Parameters
+    ----------
+    table : dict
+        The TPR lookup table.
+    nodeCount : int
+        The number of nodes in the network.
+    edgeCount : int
+        The number of edges in the network.
+    directed : bool
+        Whether the network is directed or not.
+    probability : float
+        The rewire probability.
+    Returns
+    -------
+    bool
+        True if the probability is saturated.
+    """
+    if(table is None or probability < table["lookup"]["minProbability"]):
+        return False
+    TPR, detectionCount = lookupTPR(
+        table, nodeCount, edgeCount, directed, probability)
+    return detectionCount >= table["lookup"]["minSamples"] and TPR == 1.0
+
+
+@restoresGraphToolThreads
+def extendTPRTable(
+    path,
+    sizes,
+    directed=False,
+    probabilities=(1.0,),
+    perturbationCount=96,
+    detectionTrials=1,
+    showProgress=True,
+    useMultiprocessing=True,
+    seed=None
+):
+    """
+    Builds or extends a TPR lookup table file by measuring
+    the TPR of perturbed random networks. The table is saved
+    after each (size, probability) entry, so interrupted runs
+    keep the entries measured so far.
+
+    Parameters
+    ----------
+    path : str or path-like
+        Path to the table file.
+    sizes : list of tuples
+        A list of (nodeCount, edgeCount) for the random networks.
+        Note that the sizes should correspond to the giant
+        component of the networks to be analyzed.
+    directed : bool, optional
+        Whether the networks are directed or not.
+        (defaults to False)
+    probabilities : list of float, optional
+        The rewire probabilities. Random networks are used as
+        the base for the perturbations.
+        (defaults to (1.0,))
+    perturbationCount : int, optional
+        The number of perturbations to perform for each entry.
+        (defaults to 96)
+    detectionTrials : int, optional
+        The number of times to perform community
+        detection for each perturbed network.
+        (defaults to 1)
+    showProgress : bool, optional
+        Shows a progress bar if enabled.
+        (defaults to True)
+    useMultiprocessing: bool, optional
+        Uses parallel processing.
+        (defaults to True)
+    seed : int, optional
+        Seed used to derive the random streams. The entropy of
+        the seed is stored in each entry, entries already
+        measured with the same seed are skipped (their
+        detections would be identical).
+        (defaults to None, random seed)
+    Returns
+    -------
+    dict
+        The updated TPR lookup table.
+    """
+    from .Core import calculatePerturbedTrivialCount, perturbationSeedSequence, \
+        reseedTaskArgs, runPoolTasks, closePool
+    from graph_tool import openmp_set_num_threads as gtOpenmp_set_num_threads
+
+    table = loadTPRTable(path)
+    rootEntropy = np.random.SeedSequence(seed).entropy
+    if(useMultiprocessing or seed is not None):
+        # Disabling internal multithreading of graph_tool
+        # (also required for reproducible fits)
+        gtOpenmp_set_num_threads(1)
+    if(useMultiprocessing):
+        num_processors = mp.cpu_count()
+        pool = mp.Pool(processes=num_processors)
+    allEntries = [(nodeCount, edgeCount, probability)
+                  for nodeCount, edgeCount in sizes
+                  for probability in probabilities]
+    if(showProgress):
+        allEntries = tqdm(allEntries, desc="Entries")
+    for nodeCount, edgeCount, probability in allEntries:
+        if(hasTPRSource(table, nodeCount, edgeCount, directed, probability, rootEntropy)):
+            warnings.warn("Skipping entry (%d, %d, %g): already measured with the same seed" % (
+                nodeCount, edgeCount, probability))
+            continue
+        # Independent streams for each network size
+        sizeEntropy = [int(value) for value in np.random.SeedSequence(
+            rootEntropy, spawn_key=(nodeCount, edgeCount)).generate_state(4)]
+        rng = np.random.default_rng(sizeEntropy)
+        baseEdges = [(fromIndex, toIndex) for fromIndex, toIndex in
+                     rng.integers(0, nodeCount, (edgeCount, 2))]
+        allArgs = [(nodeCount, baseEdges, directed, probability, detectionTrials, None,
+                    perturbationSeedSequence(sizeEntropy, probability, perturbationIndex))
+                   for perturbationIndex in range(perturbationCount)]
+        if(useMultiprocessing):
+            poolIterator = runPoolTasks(
+                pool, calculatePerturbedTrivialCount, allArgs, num_processors,
+                reseedArgs=reseedTaskArgs)
+        else:
+            poolIterator = enumerate(map(calculatePerturbedTrivialCount, allArgs))
+        trivialCount = 0
+        for _, (newTrivialCount, _, _, _) in tqdm(poolIterator, total=len(allArgs), desc="Perturbation", leave=False, disable=not showProgress):
+            trivialCount += newTrivialCount
+        updateTPRTable(table, nodeCount, edgeCount, directed, probability,
+                       trivialCount, perturbationCount*detectionTrials,
+                       source=rootEntropy)
+        saveTPRTable(table, path)
+    if(useMultiprocessing):
+        closePool(pool)
+    return table
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Builds or extends a TPR lookup table for random networks.")
+    parser.add_argument("path", help="Path to the table file (JSON).")
+    parser.add_argument("--nodes", type=int, nargs="+", required=True,
+                        help="Number of nodes of the random networks.")
+    parser.add_argument("--degrees", type=float, nargs="+", required=True,
+                        help="Average degrees of the random networks.")
+    parser.add_argument("--directed", action="store_true",
+                        help="Use directed networks.")
+    parser.add_argument("--probabilities", type=float, nargs="+", default=[1.0],
+                        help="Rewire probabilities (defaults to 1.0).")
+    parser.add_argument("--perturbations", type=int, default=96,
+                        help="Number of perturbations for each entry (defaults to 96).")
+    parser.add_argument("--detectionTrials", type=int, default=1,
+                        help="Number of detections for each perturbation (defaults to 1).")
+    parser.add_argument("--noMultiprocessing", action="store_true",
+                        help="Disables parallel processing.")
+    parser.add_argument("--seed", type=int, default=None,
+                        help="Random seed (defaults to a random seed).")
+    args = parser.parse_args()
+
+    # Average degree is edges/nodes for directed and 2*edges/nodes for undirected
+    edgesPerDegree = 1.0 if args.directed else 0.5
+    sizes = [(nodeCount, int(round(nodeCount*averageDegree*edgesPerDegree)))
+             for nodeCount in args.nodes
+             for averageDegree in args.degrees]
+    extendTPRTable(
+        args.path,
+        sizes,
+        directed=args.directed,
+        probabilities=args.probabilities,
+        perturbationCount=args.perturbations,
+        detectionTrials=args.detectionTrials,
+        useMultiprocessing=not args.noMultiprocessing,
+        seed=args.seed
+    )
+
+
+if __name__ == '__main__':
+    main()
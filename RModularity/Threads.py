@@ -0,0 +1,18 @@
+
+
+import functools
+
+
+def restoresGraphToolThreads(func):
+    # The functions disable the graph-tool multithreading for
+    # multiprocessing and seeded runs, the caller's setting is
+    # restored afterwards.
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        from graph_tool import openmp_get_num_threads, openmp_set_num_threads
+        threadCount = openmp_get_num_threads()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            openmp_set_num_threads(threadCount)
+    return wrapper
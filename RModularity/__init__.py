@@ -1,3 +1,5 @@
-from .Core import RModularity as RModularity,RModularityFast,modularityDifference,informationModularity 
+from .Core import RModularity as RModularity,RModularityFast,modularityDifference,informationModularity,analyze 
+from .TPRTable import loadTPRTable,saveTPRTable,extendTPRTable,lookupTPR
 
 __version__ = "0.3.0"
+from .Result import RModularityResult,loadResult,aggregateResults
@@ -1,7 +1,6 @@
 import RModularity
 import igraph as ig
 from pathlib import Path
-import pickle as pkl
 
 import numpy as np
 import matplotlib.pyplot as plt
@@ -21,22 +20,18 @@ if __name__ == '__main__':
 
     g = ig.Graph.Read_GML(str(Path("SampleNetworks")/("%s.gml" % networkName)))
 
-    Q_diff = RModularity.modularityDifference(
-        g.vcount(),
-        g.get_edgelist(),
-        g.is_directed()
-    )
-
-    print("Q_diff = ", Q_diff)
-
-    Q_DL = RModularity.informationModularity(
-        g.vcount(),
-        g.get_edgelist(),
-        g.is_directed()
-    )
-    print("Q_DL = ", Q_DL)
-
     if(useFast):
+        # Q_diff and Q_DL in a single pass (Q_DL is averaged over the
+        # SBM fits of the giant component, see analyze)
+        results = RModularity.analyze(
+            g.vcount(),
+            g.get_edgelist(),
+            g.is_directed(),
+            metrics=("Q_DL", "Q_diff"),
+            )
+        print("Q_diff = ", results["Q_diff"])
+        print("Q_DL = ", results["Q_DL"])
+
         #calculating R Modularity based on the fast Monte-Carlo method
         Q_rA = RModularity.RModularityFast(
             g.vcount(),
@@ -45,36 +40,31 @@ if __name__ == '__main__':
             )
         print("Q_rA = ", Q_rA)
     else:
-        #calculate R Modularity using the complete algorithm and plot
-        # TPR curves and DL curves
-        Q_r, probabilities, TPRCurve, \
-        DLCurvesTrivial, DLCurvesDetected = RModularity.RModularity(
+        #calculate all the measures in a single pass using the complete
+        # algorithm for R Modularity and plot TPR curves and DL curves
+        results = RModularity.analyze(
             g.vcount(),
             g.get_edgelist(),
             g.is_directed(),
             outputCurves=True,
             )
+        print("Q_diff = ", results["Q_diff"])
+        print("Q_DL = ", results["Q_DL"])
+        print("Q_r = ", results["Q_r"])
 
-        print("Q_r = ", Q_r)
-
-        with open("%s%s.pkl" % (networkName, outputSuffix), "wb") as fd:
-            pkl.dump((Q_r, probabilities, TPRCurve,
-                    DLCurvesTrivial, DLCurvesDetected), fd)
+        # Saving the curves as memory-mapped files
+        results["result"].save("%s%s" % (networkName, outputSuffix))
 
         # Plotting TPR and DL curves
 
-        with open("%s%s.pkl" % (networkName, outputSuffix), "rb") as fd:
-            Q_r, probabilities, TPRCurve, DLCurvesTrivial, DLCurvesDetected = pkl.load(
-                fd)
-
-        avgDLCurvesTrivial = np.mean(DLCurvesTrivial, axis=1)
-        avgDLCurvesDetected = np.mean(DLCurvesDetected, axis=1)
-        stdDLCurvesTrivial = np.std(DLCurvesTrivial, axis=1)
-        stdDLCurvesDetected = np.std(DLCurvesDetected, axis=1)
+        result = RModularity.loadResult("%s%s" % (networkName, outputSuffix))
+        Q_r = result.RModularity
+        probabilities = result.probabilities
+        TPRCurve = result.TPRCurve
 
-        diffDLCurves = (DLCurvesTrivial-DLCurvesDetected) / DLCurvesTrivial
-        avgDiffDLCurves = np.mean(diffDLCurves, axis=1)
-        stdDiffDLCurves = np.std(diffDLCurves, axis=1)
+        avgDLCurvesTrivial, stdDLCurvesTrivial = result.DLTrivialStatistics()
+        avgDLCurvesDetected, stdDLCurvesDetected = result.DLDetectedStatistics()
+        avgDiffDLCurves, stdDiffDLCurves = result.DLDifferenceStatistics()
 
         # TPR Curve
         fig = plt.figure(figsize=(3*1.61803398875, 3))
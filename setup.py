@@ -17,6 +17,11 @@ setuptools.setup(
     install_requires=[req for req in requirements if req[:2] != "# "],
     url="https://github.com/filipinascimento/RModularity",
     packages=setuptools.find_packages(),
+    entry_points={
+        "console_scripts": [
+            "rmodularity-tprtable=RModularity.TPRTable:main",
+        ],
+    },
     classifiers=[
         "Programming Language :: Python :: 3",
         "License :: OSI Approved :: MIT License",
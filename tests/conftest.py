@@ -0,0 +1,31 @@
+import importlib
+import importlib.util
+import os
+import sys
+
+import pytest
+
+
+packageDirectory = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "RModularity")
+
+
+def importSubmodule(name):
+    # Imports a module of the package. If the package __init__ can not be
+    # imported (Core requires graph-tool, igraph and louvain), the package
+    # is registered without running it, so that modules that do not
+    # depend on Core can still be tested.
+    if("RModularity" not in sys.modules):
+        try:
+            importlib.import_module("RModularity")
+        except ImportError:
+            spec = importlib.util.spec_from_file_location(
+                "RModularity", os.path.join(packageDirectory, "__init__.py"),
+                submodule_search_locations=[packageDirectory])
+            sys.modules["RModularity"] = importlib.util.module_from_spec(spec)
+    return importlib.import_module("RModularity.%s" % name)
+
+
+@pytest.fixture(scope="session")
+def RModularitySubmodule():
+    return importSubmodule
@@ -0,0 +1,82 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+
+@pytest.fixture(scope="module")
+def AdaptiveGrid(RModularitySubmodule):
+    return RModularitySubmodule("AdaptiveGrid")
+
+
+def stepTPR(probability):
+    # TPR jumps from 0 to 1 at p=0.55
+    return 1.0 if probability >= 0.55 else 0.0
+
+
+def runAdaptiveGrid(AdaptiveGrid, TPRFunction, initialResolution, tolerance, maxPoints):
+    # Same loop as the adaptive grid of RModularity
+    curvePoints = {}
+    newProbabilities = list(np.linspace(0, 1, initialResolution))
+    while(newProbabilities):
+        for probability in newProbabilities:
+            curvePoints[probability] = TPRFunction(probability)
+        probabilities = sorted(curvePoints)
+        TPRValues = [curvePoints[probability] for probability in probabilities]
+        newProbabilities = AdaptiveGrid.refineProbabilities(
+            probabilities, TPRValues, tolerance, maxPoints-len(curvePoints))
+    return probabilities, TPRValues
+
+
+def test_flat_curve_is_not_refined(AdaptiveGrid):
+    probabilities = list(np.linspace(0, 1, 9))
+    assert AdaptiveGrid.refineProbabilities(probabilities, [0.0]*9, 0.01, 42) == []
+    assert AdaptiveGrid.refineProbabilities(probabilities, [1.0]*9, 0.01, 42) == []
+
+
+def test_bisects_the_interval_where_TPR_changes(AdaptiveGrid):
+    probabilities = list(np.linspace(0, 1, 9))
+    TPRValues = [stepTPR(probability) for probability in probabilities]
+    assert AdaptiveGrid.refineProbabilities(
+        probabilities, TPRValues, 0.01, 42) == [0.5625]
+
+
+def test_stops_when_total_error_is_within_tolerance(AdaptiveGrid):
+    probabilities = [0.0, 0.5, 1.0]
+    # Estimated errors 0.02 and 0.005
+    TPRValues = [0.0, 0.08, 0.1]
+    assert AdaptiveGrid.refineProbabilities(probabilities, TPRValues, 0.03, 42) == []
+    # Only the interval above its share of the tolerance is bisected
+    assert AdaptiveGrid.refineProbabilities(probabilities, TPRValues, 0.02, 42) == [0.25]
+
+
+def test_largest_errors_are_refined_first_up_to_the_limit(AdaptiveGrid):
+    probabilities = [0.0, 0.25, 0.5, 0.75, 1.0]
+    TPRValues = [0.0, 0.1, 0.6, 0.65, 1.0]
+    assert AdaptiveGrid.refineProbabilities(
+        probabilities, TPRValues, 0.01, 4) == [0.375, 0.875, 0.125, 0.625]
+    assert AdaptiveGrid.refineProbabilities(
+        probabilities, TPRValues, 0.01, 2) == [0.375, 0.875]
+    assert AdaptiveGrid.refineProbabilities(probabilities, TPRValues, 0.01, 0) == []
+
+
+def test_grid_concentrates_points_around_the_transition(AdaptiveGrid):
+    tolerance = 0.001
+    probabilities, TPRValues = runAdaptiveGrid(AdaptiveGrid, stepTPR, 9, tolerance, 51)
+    assert 9 < len(probabilities) < 51
+    intervalErrors = 0.5*np.diff(probabilities)*np.abs(np.diff(TPRValues))
+    assert np.sum(intervalErrors) <= tolerance
+    # The integral of the step (0.45) is estimated within the tolerance
+    TPRArea = np.sum(0.5*np.diff(probabilities)*(np.array(TPRValues[1:])+TPRValues[:-1]))
+    assert abs(TPRArea-0.45) <= tolerance
+    # Points are only added inside the interval of the transition
+    assert [probability for probability in probabilities
+            if probability not in np.linspace(0, 1, 9)] == sorted(
+        probability for probability in probabilities
+        if 0.5 < probability < 0.625)
+
+
+def test_grid_stops_at_the_maximum_number_of_points(AdaptiveGrid):
+    def linearTPR(probability):
+        return probability
+    probabilities, _ = runAdaptiveGrid(AdaptiveGrid, linearTPR, 9, 1e-6, 20)
+    assert len(probabilities) == 20
@@ -0,0 +1,115 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+
+@pytest.fixture(scope="module")
+def Result(RModularitySubmodule):
+    return RModularitySubmodule("Result")
+
+
+def makeResult(Result, probabilities, seed=0, curvesDType=None):
+    rng = np.random.default_rng(seed)
+    probabilities = np.asarray(probabilities)
+    TPRCurve = np.linspace(0, 1, len(probabilities))
+    DLCurvesTrivial = rng.uniform(100, 200, (len(probabilities), 6))
+    DLCurvesDetected = DLCurvesTrivial*rng.uniform(0.5, 1.0, DLCurvesTrivial.shape)
+    # Perturbations that were not calculated
+    DLCurvesTrivial[-1] = np.nan
+    DLCurvesDetected[-1] = np.nan
+    return Result.RModularityResult(
+        0.5+seed, probabilities, TPRCurve, DLCurvesTrivial, DLCurvesDetected,
+        curvesDType=curvesDType, metadata={"seed": seed})
+
+
+def assertSameResult(loaded, result):
+    assert loaded.RModularity == result.RModularity
+    assert loaded.metadata == result.metadata
+    np.testing.assert_array_equal(loaded.probabilities, result.probabilities)
+    np.testing.assert_array_equal(loaded.TPRCurve, result.TPRCurve)
+    np.testing.assert_array_equal(loaded.DLCurvesTrivial, result.DLCurvesTrivial)
+    np.testing.assert_array_equal(loaded.DLCurvesDetected, result.DLCurvesDetected)
+    assert loaded.DLCurvesTrivial.dtype == result.DLCurvesTrivial.dtype
+    assert loaded.DLCurvesDetected.dtype == result.DLCurvesDetected.dtype
+
+
+def test_float32_curves_and_statistics(Result):
+    result = makeResult(Result, np.linspace(0, 1, 5), curvesDType=np.float32)
+    assert result.DLCurvesTrivial.dtype == np.float32
+    assert result.DLCurvesDetected.dtype == np.float32
+
+    RModularity, probabilities, TPRCurve, DLCurvesTrivial, _ = result
+    assert RModularity == 0.5
+    assert len(probabilities) == len(TPRCurve) == len(DLCurvesTrivial) == 5
+
+    averages, deviations = result.DLDifferenceStatistics()
+    assert averages.dtype == np.float64
+    trivial = result.DLCurvesTrivial[:-1].astype(np.float64)
+    detected = result.DLCurvesDetected[:-1].astype(np.float64)
+    np.testing.assert_allclose(
+        averages[:-1], np.mean((trivial-detected)/trivial, axis=1))
+    np.testing.assert_allclose(
+        deviations[:-1], np.std((trivial-detected)/trivial, axis=1))
+    assert np.isnan(averages[-1]) and np.isnan(deviations[-1])
+
+
+@pytest.mark.parametrize("compressed", [False, True])
+def test_npz_round_trip(Result, tmp_path, compressed):
+    result = makeResult(Result, np.linspace(0, 1, 5), curvesDType=np.float32)
+    path = tmp_path/"result.npz"
+    result.save(path, compressed=compressed)
+    loaded = Result.loadResult(path)
+    assertSameResult(loaded, result)
+    assert not isinstance(loaded.DLCurvesTrivial, np.memmap)
+
+
+def test_directory_round_trip_is_memory_mapped(Result, tmp_path):
+    result = makeResult(Result, np.linspace(0, 1, 5), curvesDType=np.float32)
+    path = tmp_path/"result"
+    result.save(path)
+    loaded = Result.loadResult(path)
+    assertSameResult(loaded, result)
+    assert isinstance(loaded.DLCurvesTrivial, np.memmap)
+    assert isinstance(loaded.DLCurvesDetected, np.memmap)
+    np.testing.assert_array_equal(
+        loaded.DLDifferenceStatistics(), result.DLDifferenceStatistics())
+
+    inMemory = Result.loadResult(path, mmapMode=None)
+    assertSameResult(inMemory, result)
+    assert not isinstance(inMemory.DLCurvesTrivial, np.memmap)
+
+
+def test_aggregate_stacks_results_with_the_same_probabilities(Result, tmp_path):
+    probabilities = np.linspace(0, 1, 5)
+    results = [makeResult(Result, probabilities, seed=seed, curvesDType=np.float32)
+               for seed in range(3)]
+    paths = [tmp_path/"result0.npz", tmp_path/"result1", tmp_path/"result2.npz"]
+    results[0].save(paths[0])
+    results[1].save(paths[1])
+    results[2].save(paths[2], compressed=True)
+
+    aggregated = Result.aggregateResults(paths)
+    np.testing.assert_array_equal(aggregated["RModularity"], [0.5, 1.5, 2.5])
+    assert aggregated["probabilities"].shape == (3, 5)
+    assert aggregated["TPRCurves"].shape == (3, 5)
+    assert aggregated["metadata"] == [{"seed": seed} for seed in range(3)]
+    assert "DLDifferenceAverages" not in aggregated
+
+    aggregated = Result.aggregateResults(paths, DLStatistics=True)
+    assert aggregated["DLDifferenceAverages"].shape == (3, 5)
+    for index, result in enumerate(results):
+        averages, deviations = result.DLDifferenceStatistics()
+        np.testing.assert_allclose(aggregated["DLDifferenceAverages"][index], averages)
+        np.testing.assert_allclose(aggregated["DLDifferenceDeviations"][index], deviations)
+
+
+def test_aggregate_keeps_lists_for_different_probabilities(Result, tmp_path):
+    paths = [tmp_path/"uniform.npz", tmp_path/"adaptive", tmp_path/"short.npz"]
+    makeResult(Result, np.linspace(0, 1, 5)).save(paths[0])
+    makeResult(Result, [0, 0.25, 0.375, 0.5, 1.0]).save(paths[1])
+    makeResult(Result, [0, 0.5, 1.0]).save(paths[2])
+
+    aggregated = Result.aggregateResults(paths, DLStatistics=True)
+    assert isinstance(aggregated["probabilities"], list)
+    assert [len(curve) for curve in aggregated["TPRCurves"]] == [5, 5, 3]
+    assert [len(curve) for curve in aggregated["DLDifferenceAverages"]] == [5, 5, 3]
@@ -0,0 +1,70 @@
+import pytest
+
+pytest.importorskip("numpy")
+pytest.importorskip("tqdm")
+
+
+@pytest.fixture(scope="module")
+def TPRTable(RModularitySubmodule):
+    return RModularitySubmodule("TPRTable")
+
+
+def test_lookup_combines_entries_within_size_tolerance(TPRTable):
+    table = TPRTable.newTPRTable(sizeTolerance=0.1)
+    TPRTable.updateTPRTable(table, 100, 300, False, 1.0, 40, 50)
+    TPRTable.updateTPRTable(table, 100, 300, False, 1.0, 10, 50)
+    TPRTable.updateTPRTable(table, 108, 320, False, 1.0, 50, 50)
+    # Outside the tolerance, other direction or other probability
+    TPRTable.updateTPRTable(table, 150, 300, False, 1.0, 0, 50)
+    TPRTable.updateTPRTable(table, 100, 300, True, 1.0, 0, 50)
+    TPRTable.updateTPRTable(table, 100, 300, False, 0.5, 0, 50)
+
+    assert TPRTable.lookupTPR(table, 100, 300, False, 1.0) == (100/150, 150)
+    assert TPRTable.lookupTPR(table, 100, 300, True, 1.0) == (0.0, 50)
+    assert TPRTable.lookupTPR(table, 1000, 3000, False, 1.0) == (None, 0)
+    assert TPRTable.lookupTPR(table, 100, 300, False, 0.9) == (None, 0)
+
+
+def test_saturation_requires_min_samples_and_trivial_detections(TPRTable):
+    table = TPRTable.newTPRTable(minProbability=0.9, minSamples=96)
+    TPRTable.updateTPRTable(table, 100, 300, False, 1.0, 50, 50)
+    assert not TPRTable.isSaturatedProbability(table, 100, 300, False, 1.0)
+
+    TPRTable.updateTPRTable(table, 105, 310, False, 1.0, 50, 50)
+    assert TPRTable.isSaturatedProbability(table, 100, 300, False, 1.0)
+    assert not TPRTable.isSaturatedProbability(table, 200, 600, False, 1.0)
+
+    TPRTable.updateTPRTable(table, 100, 300, False, 0.5, 100, 100)
+    assert not TPRTable.isSaturatedProbability(table, 100, 300, False, 0.5)
+
+    TPRTable.updateTPRTable(table, 100, 300, False, 1.0, 99, 100)
+    assert not TPRTable.isSaturatedProbability(table, 100, 300, False, 1.0)
+    assert not TPRTable.isSaturatedProbability(None, 100, 300, False, 1.0)
+
+
+def test_same_source_is_not_counted_twice(TPRTable):
+    table = TPRTable.newTPRTable()
+    assert TPRTable.updateTPRTable(table, 100, 300, False, 1.0, 96, 96, source=42)
+    assert not TPRTable.updateTPRTable(table, 100, 300, False, 1.0, 96, 96, source=42)
+    assert TPRTable.updateTPRTable(table, 100, 300, False, 1.0, 90, 96, source=43)
+    assert TPRTable.hasTPRSource(table, 100, 300, False, 1.0, 42)
+    assert not TPRTable.hasTPRSource(table, 100, 300, False, 0.5, 42)
+    assert TPRTable.lookupTPR(table, 100, 300, False, 1.0) == (186/192, 192)
+
+
+def test_save_and_load_round_trip(TPRTable, tmp_path):
+    path = tmp_path/"table.json"
+    table = TPRTable.newTPRTable()
+    TPRTable.updateTPRTable(table, 100, 300, False, 1.0, 96, 96, source=42)
+    TPRTable.updateTPRTable(table, 1000, 5000, True, 0.75, 10, 96)
+    TPRTable.saveTPRTable(table, path)
+    assert sorted(tmp_path.iterdir()) == [path]
+
+    loaded = TPRTable.loadTPRTable(path, minSamples=10, sizeTolerance=0.2)
+    assert loaded["entries"] == table["entries"]
+    assert loaded["lookup"]["minSamples"] == 10
+    assert loaded["lookup"]["sizeTolerance"] == 0.2
+    assert not TPRTable.updateTPRTable(loaded, 100, 300, False, 1.0, 96, 96, source=42)
+
+    emptyTable = TPRTable.loadTPRTable(tmp_path/"missing.json")
+    assert emptyTable["entries"] == {}
@@ -0,0 +1,86 @@
+import multiprocessing as mp
+import time
+
+import pytest
+
+pytest.importorskip("graph_tool")
+pytest.importorskip("igraph")
+pytest.importorskip("louvain")
+
+from RModularity.Core import runPoolTasks, startTaskTracking, closePool
+
+
+def sleepTask(duration):
+    time.sleep(duration)
+    return duration
+
+
+def fastCopyArgs(args, attempt):
+    # Copies of a task finish right away
+    return 0.05
+
+
+def test_reused_pool_does_not_count_busy_workers_as_timeouts():
+    pool = mp.Pool(processes=2)
+    manager, taskStartTimes = startTaskTracking(taskTimeout=2.0)
+    try:
+        # The copy wins and the original keeps its worker busy
+        firstStats = {}
+        firstResults = dict(runPoolTasks(
+            pool, sleepTask, [10.0], 2, taskTimeout=0.5,
+            reseedArgs=fastCopyArgs, stragglerStats=firstStats,
+            taskStartTimes=taskStartTimes))
+        assert firstResults == {0: 0.05}
+        assert firstStats["timeouts"] == 1
+        assert firstStats["speculativeWins"] == 1
+
+        # Only one worker is free, but no task exceeds its budget
+        secondStats = {}
+        secondResults = dict(runPoolTasks(
+            pool, sleepTask, [0.2]*5, 2, taskTimeout=2.0,
+            reseedArgs=fastCopyArgs, stragglerStats=secondStats,
+            taskStartTimes=taskStartTimes))
+        assert secondResults == {taskIndex: 0.2 for taskIndex in range(5)}
+        assert secondStats["timeouts"] == 0
+        assert secondStats["speculative"] == 0
+    finally:
+        closePool(pool, abandonTasks=True, manager=manager)
+
+
+def test_timeout_copies_start_before_queued_tasks():
+    pool = mp.Pool(processes=2)
+    try:
+        stats = {}
+        allArgs = [10.0]+[0.2]*20
+        finishOrder = [taskIndex for taskIndex, _ in runPoolTasks(
+            pool, sleepTask, allArgs, 2, taskTimeout=2.0,
+            reseedArgs=fastCopyArgs, stragglerStats=stats)]
+        assert sorted(finishOrder) == list(range(len(allArgs)))
+        assert stats["timeouts"] == 1
+        assert stats["speculativeWins"] == 1
+        # The copy of task 0 does not wait for the whole queue
+        assert finishOrder.index(0) < finishOrder.index(len(allArgs)-1)
+    finally:
+        closePool(pool, abandonTasks=True)
+
+
+def sleepKindTask(args):
+    _, duration = args
+    time.sleep(duration)
+    return duration
+
+
+def test_speculation_compares_tasks_of_the_same_kind():
+    pool = mp.Pool(processes=3)
+    try:
+        # Slow tasks are only stragglers when compared to the fast kind,
+        # and a worker stays free to run copies.
+        allArgs = [("fast", 0.05)]*6+[("slow", 1.0)]*2
+        stats = {}
+        results = dict(runPoolTasks(
+            pool, sleepKindTask, allArgs, 3, speculativeFactor=3.0,
+            stragglerStats=stats, durationKey=lambda args: args[0]))
+        assert len(results) == len(allArgs)
+        assert stats["speculative"] == 0
+    finally:
+        closePool(pool, abandonTasks=True)